@@ -37,3 +37,13 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    # mixer заполняет Post.image случайными картинками — пишем их
+    # во временный каталог, а не в yatube/media.
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
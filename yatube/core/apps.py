@@ -3,3 +3,17 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import querylog
+        from .db import apply_sqlite_pragmas
+        from .metrics import install_template_timer
+        install_template_timer()
+        connection_created.connect(
+            apply_sqlite_pragmas, dispatch_uid='core.sqlite_pragmas'
+        )
+        connection_created.connect(
+            querylog.install, dispatch_uid='core.querylog'
+        )
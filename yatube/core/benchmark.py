@@ -0,0 +1,147 @@
+"""Общие помощники для команд-бенчмарков.
+
+Бенчмарки работают на временной базе, которую создаёт тот же механизм,
+что и для тестов, поэтому рабочая база никогда не затрагивается.
+"""
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.error import HTTPError, URLError
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+
+
+@contextmanager
+def benchmark_database(using='default', name=None):
+    """Создаёт временную базу с применёнными миграциями.
+
+    `name` — путь к файлу базы; по умолчанию SQLite держит её в памяти.
+    """
+    connection = connections[using]
+    old_name = connection.settings_dict['NAME']
+    if name is not None:
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, repeat=5):
+    """Запускает func repeat раз и возвращает времена в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def peak_memory(func):
+    """Пиковый объём памяти Python (КиБ), выделенной во время func()."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def summarize(timings):
+    """Медиана и перцентили p50/p95/p99 для списка времён."""
+    ordered = sorted(timings)
+
+    def percentile(fraction):
+        return ordered[max(0, int(round(len(ordered) * fraction)) - 1)]
+
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 3),
+        'p50_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(percentile(0.95), 3),
+        'p99_ms': round(percentile(0.99), 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI-сервер с постоянным пулом потоков, как у воркеров gunicorn.
+
+    В отличие от ThreadedWSGIServer, потоки живут между запросами,
+    поэтому постоянные соединения с базой (CONN_MAX_AGE) переиспользуются.
+    """
+
+    def __init__(self, *args, workers=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+@contextmanager
+def wsgi_server(workers=8):
+    """Запускает приложение проекта на свободном порту; отдаёт адрес."""
+    server = PooledWSGIServer(
+        ('127.0.0.1', 0), QuietHandler, workers=workers
+    )
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address
+        yield f'http://{host}:{port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+# Редиректы не выполняем: время ответа не должно включать следующую
+# страницу, а сам редирект (например, после post_create) — успех.
+opener = build_opener(NoRedirect)
+
+
+def fetch(url, data=None, headers=None):
+    """Выполняет HTTP-запрос; возвращает время в мс, успех и тело."""
+    started = time.perf_counter()
+    body = b''
+    try:
+        request = Request(url, data=data, headers=headers or {})
+        with opener.open(request, timeout=30) as response:
+            body = response.read()
+            ok = True
+    except HTTPError as error:
+        ok = error.code < 400
+    except (URLError, OSError):
+        ok = False
+    return (time.perf_counter() - started) * 1000, ok, body
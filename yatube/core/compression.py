@@ -0,0 +1,148 @@
+"""Сжатие ответов gzip и brotli.
+
+CompressionMiddleware сжимает HTML и прочий текст под Accept-Encoding
+клиента: обычные ответы — целиком, если они не меньше
+COMPRESSION_MIN_SIZE, потоковые — по частям, без накопления в памяти.
+Страницы с ETag от conditional_page кэшируются уже сжатыми: ETag
+описывает всё, от чего зависит страница, поэтому повторный запрос
+с тем же ETag и той же кодировкой получает готовые байты без отрисовки
+и без сжатия.
+"""
+import gzip
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Порядок — по предпочтению: brotli сжимает текст лучше gzip.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+    'image/x-icon',
+    'image/vnd.microsoft.icon',
+)
+# Заголовки, которые не переносятся в кэш сжатых страниц.
+UNCACHED_HEADERS = ('set-cookie', 'content-length')
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    weights = {}
+    for part in header.split(','):
+        token, _, params = part.partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token] = weight
+    wildcard = weights.get('*', 0)
+    return {
+        encoding for encoding, _ in ENCODINGS
+        if weights.get(encoding, wildcard) > 0
+    }
+
+
+def available_encodings():
+    return [
+        encoding for encoding, _ in ENCODINGS
+        if encoding != 'br' or brotli is not None
+    ]
+
+
+def choose_encoding(request):
+    """Кодировка ответа на request или None — без сжатия."""
+    accepted = accepted_encodings(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def is_compressible_type(content_type):
+    return content_type.split(';', 1)[0].strip().startswith(
+        COMPRESSIBLE_TYPES
+    )
+
+
+def compress(content, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(content, quality=level)
+    # mtime=0: одинаковое содержимое даёт одинаковые байты.
+    return gzip.compress(content, level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level):
+    """Сжимает поток частей, отдавая сжатое после каждой части."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    # wbits 16 + MAX_WBITS — формат gzip, а не голый zlib.
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def get_cache():
+    return caches[settings.COMPRESSION_CACHE_ALIAS]
+
+
+def page_key(etag, encoding):
+    level = settings.COMPRESSION_LEVELS[encoding]
+    return f'compressed:{encoding}:{level}:{etag}'
+
+
+def cached_page(request, etag):
+    """Готовый сжатый ответ для страницы с этим ETag или None."""
+    if not settings.COMPRESSION_CACHE_PAGES:
+        return None
+    encoding = choose_encoding(request)
+    if encoding is None:
+        return None
+    entry = get_cache().get(page_key(etag, encoding))
+    if entry is None:
+        return None
+    headers, content = entry
+    response = HttpResponse(content)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def cache_page(etag, encoding, response):
+    headers = [
+        (header, value) for header, value in response.items()
+        if header.lower() not in UNCACHED_HEADERS
+    ]
+    get_cache().set(
+        page_key(etag, encoding),
+        (headers, response.content),
+        settings.COMPRESSION_CACHE_TIMEOUT,
+    )
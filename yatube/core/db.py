@@ -0,0 +1,17 @@
+"""Настройка соединений SQLite для продакшена.
+
+PRAGMA из SQLITE_PRAGMAS выполняются на каждом новом соединении.
+WAL позволяет читать во время записи, synchronous=NORMAL в режиме WAL
+не теряет целостность при сбое, mmap и cache_size сокращают чтения
+с диска, busy_timeout заставляет ждать блокировку, а не падать.
+"""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
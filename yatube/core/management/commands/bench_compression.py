@@ -0,0 +1,125 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+
+from core.benchmark import benchmark_database
+from core.compression import available_encodings, compress, get_cache
+from posts.cache import get_cache as get_posts_cache
+from posts.models import AuthorStat, Group
+from posts.seeding import seed_data
+
+LEVELS = {'gzip': [1, 6, 9], 'br': [1, 5, 8, 11]}
+
+
+def cpu_ms(func, repeat):
+    """Процессорное время одного вызова func, мс."""
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return round((time.process_time() - started) * 1000 / repeat, 3)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сжимает главную, ленту группы и профиль gzip и brotli '
+        'на разных уровнях и выводит байты в сети и процессорное '
+        'время на запрос, в том числе с кэшем сжатых страниц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def get_pages(self):
+        author = AuthorStat.objects.order_by('-posts_count').first().user
+        group = Group.objects.order_by('-posts_count').first()
+        return {
+            'index': reverse('posts:index'),
+            'group_posts': reverse('posts:group_list', args=[group.slug]),
+            'profile': reverse('posts:profile', args=[author.username]),
+        }
+
+    def measure_levels(self, content, repeat):
+        """Размер и время сжатия тела страницы каждым уровнем."""
+        report = {'identity': {'bytes': len(content), 'cpu_ms': 0}}
+        for encoding in available_encodings():
+            for level in LEVELS[encoding]:
+                report[f'{encoding}:{level}'] = {
+                    'bytes': len(compress(content, encoding, level)),
+                    'cpu_ms': cpu_ms(
+                        lambda: compress(content, encoding, level), repeat
+                    ),
+                }
+        return report
+
+    def measure_requests(self, url, repeat):
+        """Процессорное время запроса целиком по кодировкам.
+
+        cold — каждый раз отрисовка и сжатие, warm — готовая сжатая
+        страница из кэша.
+        """
+        client = Client()
+        report = {}
+        for encoding in [None, *available_encodings()]:
+            headers = {'HTTP_ACCEPT_ENCODING': encoding or 'identity'}
+
+            def cold():
+                get_posts_cache().clear()
+                get_cache().clear()
+                client.get(url, **headers)
+            cold()
+            response = client.get(url, **headers)
+            report[encoding or 'identity'] = {
+                'bytes': len(response.content),
+                'cold_cpu_ms': cpu_ms(cold, repeat),
+                'warm_cpu_ms': cpu_ms(
+                    lambda: client.get(url, **headers), repeat
+                ),
+            }
+        return report
+
+    def handle(self, *args, **options):
+        report = {'levels': {}, 'requests': {}}
+        setup_test_environment()
+        try:
+            with benchmark_database(), override_settings(
+                DEBUG=False, PERF_METRICS_ENABLED=False,
+                QUERY_LOG_ENABLED=False,
+            ):
+                seed_data(50, 5, options['posts'])
+                for name, url in self.get_pages().items():
+                    self.stderr.write(f'Замеряем {name}')
+                    content = Client().get(url).content
+                    report['levels'][name] = self.measure_levels(
+                        content, options['repeat']
+                    )
+                    report['requests'][name] = self.measure_requests(
+                        url, options['repeat']
+                    )
+        finally:
+            teardown_test_environment()
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        for name, levels in report['levels'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for level, result in levels.items():
+                self.stdout.write(
+                    f'  {level}: {result["bytes"]} байт, '
+                    f'{result["cpu_ms"]} мс'
+                )
+            for encoding, result in report['requests'][name].items():
+                self.stdout.write(
+                    f'  запрос {encoding}: {result["bytes"]} байт, '
+                    f'без кэша {result["cold_cpu_ms"]} мс, '
+                    f'из кэша {result["warm_cpu_ms"]} мс'
+                )
@@ -0,0 +1,117 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core.benchmark import benchmark_database, fetch, summarize, wsgi_server
+from posts.cache import get_cache
+from posts.models import AuthorStat, Group, Post
+from posts.seeding import seed_data
+
+
+def read_paths():
+    author = AuthorStat.objects.order_by('-posts_count').first().user
+    group = Group.objects.order_by('-posts_count').first()
+    post = Post.objects.first()
+    return [
+        '/',
+        f'/group/{group.slug}/',
+        f'/profile/{author.username}/',
+        f'/posts/{post.pk}/',
+    ]
+
+
+def run_load(base_url, paths, concurrency, total):
+    """total запросов по кругу через paths в concurrency потоков."""
+    urls = [base_url + paths[number % len(paths)] for number in range(total)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+    timings = [timing for timing, ok, _ in results if ok]
+    return {
+        'concurrency': concurrency,
+        'requests_per_second': round(len(timings) / elapsed, 1),
+        'errors': len(results) - len(timings),
+        **(summarize(timings) if timings else {}),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает страницы чтения параллельными запросами и выводит '
+        'запросы в секунду и хвосты задержек'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default=None,
+            help='Адрес уже запущенного сервера; без него команда '
+                 'поднимает локальный WSGI-сервер на временной базе',
+        )
+        parser.add_argument(
+            '--paths', default=None,
+            help='Пути через запятую; по умолчанию — главная, группа, '
+                 'профиль и пост',
+        )
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--concurrency', default='1,4,16')
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Потоков у локального сервера',
+        )
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument(
+            '--db-file', default=None,
+            help='Файл временной базы (по умолчанию — в памяти)',
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        with ExitStack() as stack:
+            if options['url']:
+                base_url = options['url'].rstrip('/')
+                paths = options['paths'].split(',') if options['paths'] else [
+                    '/'
+                ]
+            else:
+                base_url, paths = self.start_server(stack, options)
+            self.stderr.write(f'Нагружаем {base_url}: {", ".join(paths)}')
+            # Прогрев: шаблоны, соединения и кэш, как у живого сервера.
+            run_load(base_url, paths, 1, len(paths) * 2)
+            report = {
+                'target': base_url,
+                'paths': paths,
+                'levels': [
+                    run_load(base_url, paths, level, options['requests'])
+                    for level in levels
+                ],
+            }
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        for level in report['levels']:
+            self.stdout.write(
+                f'{level["concurrency"]:>4} потоков: '
+                f'{level["requests_per_second"]} запр/с, '
+                f'p50 {level.get("p50_ms")} мс, p95 {level.get("p95_ms")} мс, '
+                f'p99 {level.get("p99_ms")} мс, ошибок {level["errors"]}'
+            )
+
+    def start_server(self, stack, options):
+        """Временная база с данными и WSGI-сервер в фоновом потоке."""
+        stack.enter_context(benchmark_database(name=options['db_file']))
+        stack.enter_context(override_settings(ALLOWED_HOSTS=['127.0.0.1']))
+        self.stderr.write(f'Наполняем базу: {options["posts"]} постов')
+        seed_data(100, 10, options['posts'])
+        get_cache().clear()
+        paths = (
+            options['paths'].split(',') if options['paths'] else read_paths()
+        )
+        return stack.enter_context(wsgi_server(options['workers'])), paths
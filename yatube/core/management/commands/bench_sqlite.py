@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.benchmark import benchmark_database, fetch, summarize, wsgi_server
+from posts.cache import get_cache
+from posts.models import User
+from posts.seeding import seed_data
+
+PROFILES = {
+    # Как было: журнал отката, synchronous=FULL, соединение на запрос.
+    'default': {'pragmas': {}, 'conn_max_age': 0},
+    'tuned': {'pragmas': None, 'conn_max_age': 60},
+}
+
+
+def writer_headers(user):
+    """Cookie сессии и CSRF-токен, чтобы писать через post_create."""
+    client = Client()
+    client.force_login(user)
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    token = get_token(HttpRequest())
+    headers = {
+        'Cookie': (
+            f'{settings.SESSION_COOKIE_NAME}={session}; '
+            f'{settings.CSRF_COOKIE_NAME}={token}'
+        ),
+        'Content-Type': 'application/x-www-form-urlencoded',
+    }
+    return headers, token
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite с настройками '
+        'по умолчанию и с WAL, PRAGMA и постоянными соединениями '
+        'на смеси чтений главной и записей через post_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--requests', type=int, default=600)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.2,
+            help='Доля запросов-записей',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def run_profile(self, name, profile, directory, options):
+        pragmas = profile['pragmas']
+        if pragmas is None:
+            pragmas = settings.SQLITE_PRAGMAS
+        database = connections.databases['default']
+        old_max_age = database['CONN_MAX_AGE']
+        database['CONN_MAX_AGE'] = profile['conn_max_age']
+        with ExitStack() as stack:
+            stack.callback(database.__setitem__, 'CONN_MAX_AGE', old_max_age)
+            stack.enter_context(override_settings(
+                SQLITE_PRAGMAS=pragmas, ALLOWED_HOSTS=['127.0.0.1']
+            ))
+            stack.enter_context(benchmark_database(
+                name=os.path.join(directory, f'{name}.sqlite3')
+            ))
+            self.stderr.write(f'{name}: наполняем базу')
+            author_ids, _ = seed_data(20, 5, options['posts'])
+            get_cache().clear()
+            writers = [
+                writer_headers(user)
+                for user in User.objects.filter(pk__in=author_ids[:8])
+            ]
+            base_url = stack.enter_context(wsgi_server(options['workers']))
+            return self.run_load(base_url, writers, options)
+
+    def run_load(self, base_url, writers, options):
+        rnd = random.Random(options['seed'])
+        operations = [
+            'write' if rnd.random() < options['write_ratio'] else 'read'
+            for _ in range(options['requests'])
+        ]
+
+        def run(number):
+            if operations[number] == 'read':
+                return 'read', fetch(base_url + '/')
+            headers, token = writers[number % len(writers)]
+            data = urlencode({
+                'text': f'Пост из бенчмарка {number}',
+                'csrfmiddlewaretoken': token,
+            }).encode()
+            return 'write', fetch(base_url + '/create/', data, headers)
+
+        fetch(base_url + '/')
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(run, range(len(operations))))
+        elapsed = time.perf_counter() - started
+        report = {'total_rps': round(
+            sum(1 for _, (_, ok, _) in results if ok) / elapsed, 1
+        )}
+        for kind in ('read', 'write'):
+            timings = [
+                timing for op, (timing, ok, _) in results
+                if op == kind and ok
+            ]
+            report[kind] = {
+                'rps': round(len(timings) / elapsed, 1),
+                'errors': sum(
+                    1 for op, (_, ok, _) in results if op == kind and not ok
+                ),
+                **(summarize(timings) if timings else {}),
+            }
+        return report
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        request_logger = logging.getLogger('django.request')
+        old_level = request_logger.level
+        # Ошибки «database is locked» считаются в отчёте, а не в журнале.
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            report = {
+                name: self.run_profile(name, profile, directory, options)
+                for name, profile in PROFILES.items()
+            }
+        finally:
+            request_logger.setLevel(old_level)
+            shutil.rmtree(directory)
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        for name, result in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: {result["total_rps"]} запр/с'
+            ))
+            for kind in ('read', 'write'):
+                item = result[kind]
+                self.stdout.write(
+                    f'  {kind}: {item["rps"]} запр/с, '
+                    f'p50 {item.get("p50_ms")} мс, '
+                    f'p95 {item.get("p95_ms")} мс, '
+                    f'ошибок {item["errors"]}'
+                )
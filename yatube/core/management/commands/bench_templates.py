@@ -0,0 +1,156 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.benchmark import measure, summarize
+from posts.listing import PageRows
+from posts.models import Group, Post, User
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+LISTINGS = ['posts/index.html', 'posts/group_list.html', 'posts/profile.html']
+# Цикл главной до и после строк ленты: разница — в get_full_name
+# и {% url %} на каждый пост.
+LOOPS = {
+    'objects + {% url %}': (
+        "{% for post in page_obj %}"
+        "{{ post.author.get_full_name }}"
+        "<a href=\"{% url 'posts:profile' post.author.username %}\"></a>"
+        "{{ post.pub_date|date:'d E Y' }}{{ post.text }}"
+        "<a href=\"{% url 'posts:post_detail' post.id %}\"></a>"
+        "{% if post.group %}"
+        "<a href=\"{% url 'posts:group_list' post.group.slug %}\"></a>"
+        "{% endif %}{% endfor %}"
+    ),
+    'rows': (
+        "{% for row in rows %}"
+        "{{ row.author_name }}<a href=\"{{ row.profile_url }}\"></a>"
+        "{{ row.post.pub_date|date:'d E Y' }}{{ row.post.text }}"
+        "<a href=\"{{ row.url }}\"></a>"
+        "{% if row.group_url %}<a href=\"{{ row.group_url }}\"></a>"
+        "{% endif %}{% endfor %}"
+    ),
+}
+
+
+def make_engine(cached, debug):
+    """Бэкенд шаблонов с настройками проекта и заданным загрузчиком."""
+    options = settings.TEMPLATES[0]
+    loaders = [('django.template.loaders.cached.Loader', LOADERS)]
+    return DjangoTemplates({
+        'NAME': 'cached' if cached else 'plain',
+        'DIRS': options['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **options['OPTIONS'],
+            'loaders': loaders if cached else LOADERS,
+            'debug': debug,
+        },
+    })
+
+
+def make_page(count, authors=5):
+    """Страница из count постов в памяти — база не нужна."""
+    users = [
+        User(
+            pk=number + 1, username=f'author{number}',
+            first_name='Лев', last_name='Т',
+        )
+        for number in range(authors)
+    ]
+    group = Group(pk=1, title='Группа', slug='group')
+    now = timezone.now()
+    posts = [
+        Post(
+            pk=number + 1,
+            text='Текст поста ' * 20,
+            pub_date=now,
+            author=users[number % authors],
+            group=group if number % 2 else None,
+        )
+        for number in range(count)
+    ]
+    return Paginator(posts, count).page(1)
+
+
+def make_context(page):
+    # Строки собираются заново на каждую отрисовку, как в представлении.
+    return {
+        'page_obj': page, 'rows': PageRows(page), 'feed_cache': None,
+        'group': page[0].group or Group(title='Группа', slug='group'),
+        'author': page[0].author, 'posts_count': len(page),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время отрисовки posts/index.html без кэша шаблонов '
+        '(как при DEBUG) и с кэширующим загрузчиком, цикл ленты '
+        'по моделям и по строкам ленты и страницы лент целиком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', default='10,100', help='Числа постов через запятую'
+        )
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        configs = {
+            'before (no cache, debug)': make_engine(cached=False, debug=True),
+            'after (cached loader)': make_engine(cached=True, debug=False),
+        }
+        report = {'loaders': {}, 'loops': {}, 'pages': {}}
+        engine = configs['after (cached loader)']
+        for count in map(int, options['posts'].split(',')):
+            page = make_page(count)
+
+            def timing(source, name=None):
+                """Отрисовка шаблона или, с name, загрузка из движка."""
+                def render():
+                    template = source.get_template(name) if name else source
+                    template.render(make_context(page), request)
+                render()
+                return summarize(measure(render, options['repeat']))
+            report['loaders'][count] = {
+                name: timing(config, 'posts/index.html')
+                for name, config in configs.items()
+            }
+            report['loops'][count] = {
+                name: timing(engine.from_string(source))
+                for name, source in LOOPS.items()
+            }
+            report['pages'][count] = {
+                name: timing(engine, name) for name in LISTINGS
+            }
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        titles = {
+            'loaders': 'posts/index.html',
+            'loops': 'цикл ленты',
+            'pages': 'страницы лент',
+        }
+        for section, title in titles.items():
+            for count, results in report[section].items():
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f'{title}, {count} постов'
+                ))
+                for name, timing in results.items():
+                    self.stdout.write(
+                        f'  {name}: p50 {timing["p50_ms"]} мс, '
+                        f'p95 {timing["p95_ms"]} мс'
+                    )
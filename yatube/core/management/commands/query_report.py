@@ -0,0 +1,101 @@
+import json
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def read_events(stream):
+    for line in stream:
+        # В журнале могут быть и посторонние строки — пропускаем их.
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(event, dict) and event.get('kind'):
+            yield event
+
+
+def aggregate(events):
+    """Сводит записи журнала по виду, SQL и происхождению."""
+    groups = defaultdict(lambda: {
+        'events': 0, 'queries': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+        'url_names': set(),
+    })
+    for event in events:
+        key = (
+            event['kind'], event['sql'],
+            event.get('origin'), event.get('template'),
+        )
+        group = groups[key]
+        group['events'] += 1
+        group['queries'] += event.get('count', 1)
+        group['total_ms'] += event.get('ms', 0)
+        group['max_ms'] = max(group['max_ms'], event.get('ms', 0))
+        if event.get('url_name'):
+            group['url_names'].add(event['url_name'])
+    rows = []
+    for (kind, sql, origin, template), group in groups.items():
+        rows.append({
+            'kind': kind,
+            'sql': sql,
+            'origin': origin,
+            'template': template,
+            **group,
+            'total_ms': round(group['total_ms'], 3),
+            'url_names': sorted(group['url_names']),
+        })
+    rows.sort(key=lambda row: (row['kind'], -row['total_ms']))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Сводка медленных и повторяющихся SQL-запросов из журнала'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files', nargs='*',
+            help='Файлы журнала, «-» — stdin; по умолчанию QUERY_LOG_FILE',
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def handle(self, *args, **options):
+        files = options['files'] or [settings.QUERY_LOG_FILE]
+        if files == [None]:
+            raise CommandError('Укажите файл журнала или QUERY_LOG_FILE')
+        events = []
+        for path in files:
+            if path == '-':
+                events.extend(read_events(sys.stdin))
+                continue
+            with open(path, encoding='utf-8') as stream:
+                events.extend(read_events(stream))
+        rows = aggregate(events)
+        by_kind = defaultdict(list)
+        for row in rows:
+            by_kind[row['kind']].append(row)
+        report = {
+            kind: items[:options['top']] for kind, items in by_kind.items()
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        titles = {'slow': 'Медленные запросы', 'duplicate': 'Вероятные N+1'}
+        for kind, items in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                titles.get(kind, kind)
+            ))
+            for row in items:
+                self.stdout.write(
+                    f'  {row["events"]} раз, запросов {row["queries"]}, '
+                    f'всего {row["total_ms"]} мс, '
+                    f'максимум {row["max_ms"]} мс'
+                )
+                self.stdout.write(f'    {row["origin"]}')
+                if row['template']:
+                    self.stdout.write(f'    шаблон {row["template"]}')
+                self.stdout.write(f'    {row["sql"][:200]}')
@@ -0,0 +1,147 @@
+"""Замеры производительности запросов.
+
+Для каждого замеряемого запроса считаются общее время, число и время
+SQL-запросов, время отрисовки шаблонов и размер ответа. Последние
+замеры по каждому имени URL хранятся в памяти процесса, поэтому
+гистограммы показывают картину одного воркера.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from functools import wraps
+
+from django.conf import settings
+from django.template.backends.django import Template
+
+_local = threading.local()
+_lock = threading.Lock()
+_samples = defaultdict(
+    lambda: deque(maxlen=settings.PERF_METRICS_WINDOW)
+)
+
+
+class RequestMetrics:
+    """Замеры одного запроса; заодно обёртка выполнения SQL."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall_ms = 0.0
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.response_bytes = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+    def finish(self, response):
+        self.wall_ms = (time.perf_counter() - self.started) * 1000
+        if not response.streaming:
+            self.response_bytes = len(response.content)
+
+    def as_dict(self):
+        return {
+            'wall_ms': round(self.wall_ms, 3),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_ms, 3),
+            'template_ms': round(self.template_ms, 3),
+            'response_bytes': self.response_bytes,
+        }
+
+
+def current():
+    """Замеры текущего запроса или None, если запрос не замеряется."""
+    return getattr(_local, 'metrics', None)
+
+
+def activate(metrics):
+    _local.metrics = metrics
+
+
+def deactivate():
+    _local.metrics = None
+
+
+def install_template_timer():
+    """Оборачивает отрисовку шаблонов бэкенда Django.
+
+    Обёртка стоит на шаблоне бэкенда, а не на внутреннем Template:
+    include и extends внутри него не считаются повторно. Время
+    включает SQL-запросы ленивых querysets, выполненные в шаблоне.
+    """
+    original = Template.render
+    if getattr(original, 'timed', False):
+        return
+
+    @wraps(original)
+    def render(self, *args, **kwargs):
+        metrics = current()
+        if metrics is None:
+            return original(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            metrics.template_ms += (time.perf_counter() - started) * 1000
+
+    render.timed = True
+    Template.render = render
+
+
+def record(url_name, metrics):
+    with _lock:
+        _samples[url_name].append(metrics.as_dict())
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def percentile(ordered, fraction):
+    index = max(0, int(round(len(ordered) * fraction)) - 1)
+    return ordered[index]
+
+
+def histogram(values):
+    """Число замеров по корзинам PERF_METRICS_BUCKETS_MS."""
+    buckets = settings.PERF_METRICS_BUCKETS_MS
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        counts[bisect_left(buckets, value)] += 1
+    labels = [f'le_{bucket}' for bucket in buckets] + ['inf']
+    return dict(zip(labels, counts))
+
+
+def snapshot():
+    """Сводка по последним замерам для каждого имени URL."""
+    with _lock:
+        samples = {name: list(items) for name, items in _samples.items()}
+    report = {}
+    for name, items in sorted(samples.items()):
+        wall = sorted(item['wall_ms'] for item in items)
+        report[name] = {
+            'count': len(items),
+            'wall_ms': {
+                'p50': percentile(wall, 0.5),
+                'p95': percentile(wall, 0.95),
+                'max': wall[-1],
+                'histogram': histogram(wall),
+            },
+            'sql_count_avg': round(
+                sum(item['sql_count'] for item in items) / len(items), 2
+            ),
+            'sql_ms_p95': percentile(
+                sorted(item['sql_ms'] for item in items), 0.95
+            ),
+            'template_ms_p95': percentile(
+                sorted(item['template_ms'] for item in items), 0.95
+            ),
+        }
+    return report
@@ -0,0 +1,221 @@
+import json
+import logging
+import os
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import compression, querylog, routers, staticfiles
+from .metrics import RequestMetrics, activate, deactivate, record
+
+logger = logging.getLogger('core.performance')
+
+
+def server_timing(metrics):
+    return ', '.join((
+        f'total;dur={metrics.wall_ms:.1f}',
+        f'sql;dur={metrics.sql_ms:.1f};desc="{metrics.sql_count} queries"',
+        f'tpl;dur={metrics.template_ms:.1f}',
+    ))
+
+
+class PerformanceMiddleware:
+    """Замеряет долю запросов PERF_METRICS_SAMPLE_RATE.
+
+    Остальные запросы проходят без обёрток, поэтому middleware можно
+    держать включённым в продакшене. Ставится первым в MIDDLEWARE,
+    чтобы время включало работу остальных middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            not settings.PERF_METRICS_ENABLED
+            or random.random() >= settings.PERF_METRICS_SAMPLE_RATE
+        ):
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        activate(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            deactivate()
+        metrics.finish(response)
+        match = request.resolver_match
+        url_name = match.view_name if match else '-'
+        record(url_name, metrics)
+        if settings.PERF_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'url_name': url_name,
+                'status': response.status_code,
+                **metrics.as_dict(),
+            }))
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli под Accept-Encoding.
+
+    Ставится выше middleware, которые читают или меняют тело ответа,
+    и ниже PerformanceMiddleware, чтобы сжатие попадало в замеры.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not settings.COMPRESSION_ENABLED:
+            return response
+        if (
+            response.has_header('Content-Encoding')
+            or response.status_code != 200
+            or not compression.is_compressible_type(
+                response.get('Content-Type', '')
+            )
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(request)
+        if encoding is None:
+            return response
+        level = settings.COMPRESSION_LEVELS[encoding]
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding, level
+            )
+            # Длина сжатого потока заранее неизвестна.
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            response.content = compression.compress(
+                response.content, encoding, level
+            )
+            response['Content-Length'] = str(len(response.content))
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/'):
+            # Сжатые байты не совпадают с несжатыми: ETag только слабый.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        page_etag = getattr(response, 'page_etag', None)
+        if page_etag and settings.COMPRESSION_CACHE_PAGES:
+            compression.cache_page(page_etag, encoding, response)
+        return response
+
+
+class QueryLogMiddleware:
+    """Границы HTTP-запроса для поиска повторяющихся SQL-запросов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_LOG_ENABLED:
+            return self.get_response(request)
+        querylog.begin_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            querylog.end_request()
+
+
+class PrimaryStickyMiddleware:
+    """Закрепляет чтения за основной базой после записи.
+
+    Запросы, меняющие данные, и запросы в течение
+    REPLICA_STICKY_SECONDS после записи (по cookie) читают с основной
+    базы: после post_create редирект на профиль покажет новый пост,
+    даже если реплика ещё отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cookie = settings.REPLICA_STICKY_COOKIE
+        routers.begin_request(pinned=(
+            request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+            or cookie in request.COOKIES
+        ))
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.end_request()
+        if wrote and settings.REPLICA_ALIASES:
+            response.set_cookie(
+                cookie, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class PrecompressedStaticMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT, если STATIC_SERVE.
+
+    Сжатые копии готовит collectstatic (core.staticfiles), здесь
+    только выбирается файл под Accept-Encoding. Ставится первым
+    в MIDDLEWARE: остальным middleware статика не нужна.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            not settings.STATIC_SERVE
+            or request.method not in ('GET', 'HEAD')
+            or not request.path_info.startswith(settings.STATIC_URL)
+        ):
+            return self.get_response(request)
+        name = request.path_info[len(settings.STATIC_URL):]
+        path, encoding = staticfiles.find_file(
+            name, request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if path is None:
+            return self.get_response(request)
+        return self.serve(request, name, path, encoding)
+
+    def serve(self, request, name, path, encoding):
+        stat = os.stat(path)
+        if staticfiles.is_hashed(name):
+            cache_control = (
+                f'public, max-age={settings.STATIC_MAX_AGE}, immutable'
+            )
+        else:
+            cache_control = (
+                f'public, max-age={settings.STATIC_UNHASHED_MAX_AGE}'
+            )
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type=staticfiles.content_type(name),
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = cache_control
+        if encoding or staticfiles.has_variants(path):
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
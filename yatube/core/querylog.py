@@ -0,0 +1,138 @@
+"""Журнал медленных и повторяющихся SQL-запросов.
+
+Обёртка выполнения SQL ставится на каждое соединение с базой.
+Запрос дольше QUERY_LOG_SLOW_MS записывается сразу; одинаковый SQL,
+выполненный за один HTTP-запрос больше QUERY_LOG_DUPLICATE_LIMIT раз,
+записывается в конце запроса как вероятный N+1. У каждой записи
+есть происхождение: строка кода проекта и строка шаблона, откуда
+пришёл запрос. Записи — JSON в логгере core.queries, их сводит
+команда query_report.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger('core.queries')
+_local = threading.local()
+
+WHITESPACE_RE = re.compile(r'\s+')
+PLACEHOLDERS_RE = re.compile(r'\((?:%s|\?)(?:\s*,\s*(?:%s|\?))+\)')
+THIS_FILE = os.path.abspath(__file__)
+
+
+def fingerprint(sql):
+    """SQL без лишних пробелов и с IN (%s, ...) любой длины."""
+    sql = WHITESPACE_RE.sub(' ', sql).strip()
+    return PLACEHOLDERS_RE.sub('(...)', sql)
+
+
+def find_origin():
+    """Ближайшие к запросу строка кода проекта и строка шаблона."""
+    code = template = None
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None and (code is None or template is None):
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (
+            template is None
+            and frame.f_code.co_name == 'render_annotated'
+        ):
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                name = origin.template_name or origin.name
+                template = f'{name}:{token.lineno}'
+        if (
+            code is None
+            and filename != THIS_FILE
+            and filename.startswith(base_dir)
+            and 'site-packages' not in filename
+        ):
+            code = '{}:{} in {}'.format(
+                os.path.relpath(filename, base_dir),
+                frame.f_lineno,
+                frame.f_code.co_name,
+            )
+        frame = frame.f_back
+    return code, template
+
+
+def emit(kind, sql, **fields):
+    request = getattr(_local, 'request', None)
+    match = getattr(request, 'resolver_match', None)
+    logger.warning(json.dumps({
+        'kind': kind,
+        'sql': sql[:1000],
+        'path': request.path if request is not None else None,
+        'url_name': match.view_name if match else None,
+        **fields,
+    }, ensure_ascii=False))
+
+
+class RequestQueries:
+    """Счётчики SQL одного HTTP-запроса."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.origins = {}
+        self.durations = Counter()
+
+
+def begin_request(request):
+    _local.request = request
+    _local.queries = RequestQueries()
+
+
+def end_request():
+    queries = getattr(_local, 'queries', None)
+    if queries is not None:
+        limit = settings.QUERY_LOG_DUPLICATE_LIMIT
+        for sql, count in queries.counts.items():
+            if count > limit:
+                code, template = queries.origins[sql]
+                emit(
+                    'duplicate', sql, count=count,
+                    ms=round(queries.durations[sql], 3),
+                    origin=code, template=template,
+                )
+    _local.request = None
+    _local.queries = None
+
+
+def inspect_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        key = fingerprint(sql)
+        if duration >= settings.QUERY_LOG_SLOW_MS:
+            code, template = find_origin()
+            emit(
+                'slow', key, ms=round(duration, 3),
+                origin=code, template=template,
+            )
+        queries = getattr(_local, 'queries', None)
+        if queries is not None:
+            queries.counts[key] += 1
+            queries.durations[key] += duration
+            # Происхождение ищем один раз — на первом лишнем повторе.
+            if queries.counts[key] == settings.QUERY_LOG_DUPLICATE_LIMIT + 1:
+                queries.origins[key] = find_origin()
+
+
+def install(sender, connection, **kwargs):
+    """Обработчик connection_created: ставит обёртку на соединение."""
+    if (
+        settings.QUERY_LOG_ENABLED
+        and inspect_query not in connection.execute_wrappers
+    ):
+        connection.execute_wrappers.append(inspect_query)
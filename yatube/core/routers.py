@@ -0,0 +1,53 @@
+"""Маршрутизация чтений на реплики, записей — на основную базу.
+
+Состояние «читать только с основной базы» живёт в потоке запроса:
+его включает PrimaryStickyMiddleware и любая запись в этом запросе.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_local = threading.local()
+
+
+def begin_request(pinned=False):
+    _local.pinned = pinned
+    _local.wrote = False
+
+
+def end_request():
+    """Завершает запрос и сообщает, была ли в нём запись."""
+    wrote = getattr(_local, 'wrote', False)
+    _local.pinned = _local.wrote = False
+    return wrote
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            not settings.REPLICA_ALIASES
+            or model._meta.app_label not in settings.REPLICA_APPS
+            or getattr(_local, 'pinned', False)
+        ):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if (
+            instance is not None
+            and instance._state.db in settings.REPLICA_ALIASES
+        ):
+            # Связанные объекты читаем с той же реплики, что и сам объект.
+            return instance._state.db
+        return random.choice(settings.REPLICA_ALIASES)
+
+    def db_for_write(self, model, **hints):
+        # До конца запроса читаем своё же только что записанное.
+        _local.pinned = _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_ALIASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,110 @@
+"""Статика для продакшена: имена с хешем и заранее сжатые копии.
+
+CompressedManifestStorage при collectstatic добавляет к именам файлов
+хеш содержимого (ManifestStaticFilesStorage) и кладёт рядом со
+сжимаемыми файлами копии .gz и, если установлен brotli, .br.
+PrecompressedStaticMiddleware отдаёт из STATIC_ROOT готовую копию
+под Accept-Encoding клиента, ничего не сжимая на лету, а файлам
+с хешем в имени ставит Cache-Control на год.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage
+)
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.utils._os import safe_join
+
+from .compression import (
+    ENCODINGS, accepted_encodings, available_encodings, compress,
+    is_compressible_type,
+)
+
+MIN_SIZE = 256
+MAX_LEVELS = {'br': 11, 'gzip': 9}
+# Копия нужна, только если она заметно меньше оригинала.
+MAX_RATIO = 0.9
+# Хеш, который ManifestStaticFilesStorage вставляет перед расширением.
+HASH_RE = re.compile(r'\.[0-9a-f]{12}(\.[^./]*)?$')
+
+
+def content_type(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def is_compressible(name):
+    return is_compressible_type(content_type(name))
+
+
+def compressed_variants(content):
+    """Сжатые копии содержимого: {суффикс: байты}."""
+    if len(content) < MIN_SIZE:
+        return {}
+    suffixes = dict(ENCODINGS)
+    # Сжатие при сборке, а не на запрос, — можно максимальное.
+    variants = {
+        suffixes[encoding]: compress(content, encoding, MAX_LEVELS[encoding])
+        for encoding in available_encodings()
+    }
+    return {
+        suffix: data for suffix, data in variants.items()
+        if len(data) <= len(content) * MAX_RATIO
+    }
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Хеши в именах плюс .gz и .br рядом с оригиналами."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if not is_compressible(name):
+                continue
+            with self.open(name) as original:
+                variants = compressed_variants(original.read())
+            for suffix, data in variants.items():
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(data))
+                yield name, name + suffix, True
+
+
+def is_hashed(name):
+    """Файл — версия из манифеста: его содержимое под этим именем
+    уже не изменится."""
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    if not hashed_files:
+        return False
+    original = HASH_RE.sub(lambda match: match.group(1) or '', name)
+    return original != name and hashed_files.get(original) == name
+
+
+def find_file(name, accept_encoding):
+    """Путь к файлу в STATIC_ROOT и его кодировка (или None).
+
+    Возвращает (None, None), если такого файла нет.
+    """
+    if not settings.STATIC_ROOT or not name:
+        return None, None
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except SuspiciousFileOperation:
+        return None, None
+    if not os.path.isfile(path):
+        return None, None
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+def has_variants(path):
+    return any(os.path.isfile(path + suffix) for _, suffix in ENCODINGS)
@@ -0,0 +1,49 @@
+"""Предварительная компиляция шаблонов проекта.
+
+С кэширующим загрузчиком шаблон разбирается при первом обращении.
+warm_templates() делает это заранее, при старте процесса, чтобы
+первые запросы после деплоя не платили за чтение и разбор файлов.
+"""
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith('.html'):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_templates():
+    """Компилирует шаблоны из каталогов DIRS; возвращает их число.
+
+    Без кэширующего загрузчика скомпилированное не сохранится,
+    поэтому тогда ничего не делает.
+    """
+    count = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        if not any(
+            isinstance(loader, CachedLoader)
+            for loader in engine.template_loaders
+        ):
+            continue
+        for directory in engine.dirs:
+            for name in template_names(directory):
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError:
+                    logger.exception('Шаблон %s не компилируется', name)
+                    continue
+                count += 1
+    return count
@@ -0,0 +1,93 @@
+import gzip
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..compression import brotli
+from ..middleware import CompressionMiddleware
+
+User = get_user_model()
+
+
+@override_settings(COMPRESSION_ENABLED=True, COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeUser')
+        for number in range(5):
+            Post.objects.create(author=cls.user, text=f'Пост {number} ' * 20)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, encoding, url=None):
+        return self.client.get(
+            url or reverse('posts:index'), HTTP_ACCEPT_ENCODING=encoding
+        )
+
+    def test_gzip(self):
+        """Страница сжимается gzip, ETag становится слабым"""
+        plain = self.get('identity')
+        response = self.get('gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+    @skipIf(brotli is None, 'brotli не установлен')
+    def test_brotli(self):
+        """brotli предпочтительнее gzip"""
+        plain = self.get('identity')
+        response = self.get('gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_small_responses_are_not_compressed(self):
+        """Ответы короче порога уходят как есть"""
+        with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+            response = self.get('gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_repeat_hit_skips_rendering(self):
+        """Повторный запрос получает сжатую страницу из кэша"""
+        first = self.get('gzip')
+        self.assertIsNotNone(first.context)
+        second = self.get('gzip')
+        self.assertIsNone(second.context)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        # Новый пост меняет ETag, и страница рисуется заново.
+        Post.objects.create(author=self.user, text='Новый пост ' * 20)
+        third = self.get('gzip')
+        self.assertIsNotNone(third.context)
+        self.assertIn('Новый пост', gzip.decompress(third.content).decode())
+
+    def test_conditional_get_still_works(self):
+        """Слабый ETag сжатой страницы даёт 304"""
+        etag = self.get('gzip')['ETag']
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_streaming_response(self):
+        """Потоковый ответ сжимается по частям"""
+        chunks = [b'<p>' + b'x' * 1000 + b'</p>'] * 3
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks))
+        )
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b''.join(chunks),
+        )
@@ -0,0 +1,18 @@
+from django.db import connection
+from django.test import TestCase
+
+
+class SqlitePragmasTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_is_tuned(self):
+        """Новое соединение получает PRAGMA из SQLITE_PRAGMAS"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('PRAGMA есть только у SQLite')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+        self.assertEqual(self.pragma('temp_store'), 2)
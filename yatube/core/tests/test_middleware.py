@@ -0,0 +1,63 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import metrics
+
+User = get_user_model()
+
+
+@override_settings(PERF_METRICS_ENABLED=True, PERF_METRICS_SAMPLE_RATE=1.0)
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeUser')
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        """Ответ содержит общее время, время SQL и шаблонов"""
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for name in ('total;dur=', 'sql;dur=', 'tpl;dur='):
+            with self.subTest(name=name):
+                self.assertIn(name, timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+    def test_log_line_is_json(self):
+        """Строка журнала — JSON с замерами запроса"""
+        with self.assertLogs('core.performance', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['url_name'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['response_bytes'], len(response.content))
+        self.assertGreater(record['template_ms'], 0)
+
+    @override_settings(PERF_METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_measured(self):
+        """Запросы вне выборки не замеряются"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(metrics.snapshot(), {})
+
+    def test_metrics_endpoint(self):
+        """Сводку по URL видит только персонал"""
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        url = reverse('core:metrics')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.staff)
+        report = self.client.get(url).json()
+        self.assertEqual(report['posts:index']['count'], 3)
+        self.assertEqual(
+            sum(report['posts:index']['wall_ms']['histogram'].values()), 3
+        )
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from posts.models import Post
+
+from .. import querylog
+
+User = get_user_model()
+
+
+@override_settings(QUERY_LOG_SLOW_MS=10_000, QUERY_LOG_DUPLICATE_LIMIT=3)
+class QueryLogTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(5):
+            user = User.objects.create_user(username=f'user{number}')
+            Post.objects.create(author=user, text='Тестовый пост')
+
+    def events(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_duplicate_queries_from_template(self):
+        """Повторы SQL из шаблона помечаются как N+1 со строкой шаблона"""
+        template = Template(
+            '{% for post in posts %}\n{{ post.author.username }}'
+            '{% endfor %}'
+        )
+        with self.assertLogs('core.queries') as logs:
+            querylog.begin_request(None)
+            template.render(Context({'posts': Post.objects.all()}))
+            querylog.end_request()
+        event, = self.events(logs)
+        self.assertEqual(event['kind'], 'duplicate')
+        self.assertEqual(event['count'], 5)
+        self.assertIn('auth_user', event['sql'])
+        self.assertTrue(event['template'].endswith(':2'))
+        self.assertIn('test_querylog.py', event['origin'])
+
+    def test_joined_queries_are_not_duplicates(self):
+        """Запрос с select_related не помечается как N+1"""
+        with mock.patch.object(querylog, 'emit') as emit:
+            querylog.begin_request(None)
+            for post in Post.objects.select_related('author'):
+                post.author.username
+            querylog.end_request()
+        emit.assert_not_called()
+
+    @override_settings(QUERY_LOG_SLOW_MS=0)
+    def test_slow_query_and_report(self):
+        """Медленный запрос пишется с происхождением и попадает в отчёт"""
+        with self.assertLogs('core.queries') as logs:
+            Post.objects.count()
+        event, = self.events(logs)
+        self.assertEqual(event['kind'], 'slow')
+        self.assertIn('test_querylog.py', event['origin'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'queries.log')
+            with open(path, 'w') as stream:
+                stream.write('не JSON\n')
+                for record in logs.records * 2:
+                    stream.write(record.getMessage() + '\n')
+            out = StringIO()
+            call_command('query_report', path, json=True, stdout=out)
+        row, = json.loads(out.getvalue())['slow']
+        self.assertEqual(row['events'], 2)
+        self.assertEqual(row['origin'], event['origin'])
+
+    def test_fingerprint(self):
+        """Разная длина IN (...) даёт один отпечаток"""
+        self.assertEqual(
+            querylog.fingerprint('SELECT 1 WHERE id IN (%s, %s)'),
+            querylog.fingerprint('SELECT  1\nWHERE id IN (%s, %s, %s)'),
+        )
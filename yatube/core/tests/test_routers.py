@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import routers
+from ..routers import PrimaryReplicaRouter
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_ALIASES=['replica'])
+class PrimaryReplicaRoutingTest(TransactionTestCase):
+    """Основная база — тестовая, реплика — отдельный файл SQLite.
+
+    Реплику никто не обновляет, поэтому она играет роль сильно
+    отстающей копии: всё, что записано в тесте, на ней не видно.
+    """
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        with override_settings(REPLICA_ALIASES=['replica']):
+            call_command('migrate', database='replica', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        if hasattr(connections._connections, 'replica'):
+            delattr(connections._connections, 'replica')
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='SomeUser')
+        self.profile_url = reverse(
+            'posts:profile', kwargs={'username': 'SomeUser'}
+        )
+
+    def test_router_decisions(self):
+        """Чтения постов идут на реплику, записи — на основную базу"""
+        router = PrimaryReplicaRouter()
+        routers.begin_request()
+        self.assertEqual(router.db_for_read(Post), 'replica')
+        self.assertEqual(router.db_for_read(User), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+        # После записи чтения в этом же запросе идут на основную базу.
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertTrue(routers.end_request())
+
+    def test_guest_reads_from_replica(self):
+        """Без записи страница читается с реплики"""
+        Post.objects.create(author=self.user, text='Пост на основной базе')
+        self.assertEqual(Post.objects.using('replica').count(), 0)
+        response = Client().get(self.profile_url)
+        self.assertNotContains(response, 'Пост на основной базе')
+
+    def test_author_sees_new_post_after_create(self):
+        """После post_create автор видит свой пост, хотя реплика отстаёт"""
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'),
+            {'text': 'Только что написанный пост'},
+            follow=True,
+        )
+        self.assertEqual(response.redirect_chain[-1][0], self.profile_url)
+        self.assertContains(response, 'Только что написанный пост')
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, client.cookies)
+        cache.clear()
+        response = Client().get(self.profile_url)
+        self.assertNotContains(response, 'Только что написанный пост')
@@ -0,0 +1,111 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+from .. import staticfiles
+from ..compression import accepted_encodings, brotli
+
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = 'css/bootstrap.min.css'
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE='core.staticfiles.CompressedManifestStorage',
+    STATIC_SERVE=True,
+)
+class PrecompressedStaticTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed_css = staticfiles_storage.stored_name(CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, name, encoding='', **extra):
+        return self.client.get(
+            '/static/' + name, HTTP_ACCEPT_ENCODING=encoding, **extra
+        )
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_collectstatic_writes_variants(self):
+        """collectstatic кладёт рядом с CSS копию .gz с тем же текстом"""
+        path = os.path.join(STATIC_ROOT, self.hashed_css)
+        with open(path, 'rb') as original, open(path + '.gz', 'rb') as gz:
+            self.assertEqual(gzip.decompress(gz.read()), original.read())
+        self.assertEqual(static(CSS), '/static/' + self.hashed_css)
+        png = staticfiles_storage.stored_name('img/logo.png')
+        self.assertFalse(
+            os.path.exists(os.path.join(STATIC_ROOT, png + '.gz'))
+        )
+
+    def test_gzip_variant(self):
+        """Клиенту с gzip отдаётся готовая копия .gz"""
+        response = self.get(self.hashed_css, 'gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        with open(os.path.join(STATIC_ROOT, self.hashed_css), 'rb') as file_:
+            self.assertEqual(
+                gzip.decompress(self.content(response)), file_.read()
+            )
+
+    @skipIf(brotli is None, 'brotli не установлен')
+    def test_brotli_preferred(self):
+        """brotli предпочтительнее gzip, но не при q=0"""
+        response = self.get(self.hashed_css, 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        response = self.get(self.hashed_css, 'gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_identity(self):
+        """Без Accept-Encoding отдаётся несжатый файл"""
+        response = self.get(self.hashed_css)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_cache_control(self):
+        """Файлам с хешем — год и immutable, остальным — недолго"""
+        response = self.get(self.hashed_css)
+        self.assertEqual(
+            response['Cache-Control'], 'public, max-age=31536000, immutable'
+        )
+        response = self.get(CSS)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_not_modified(self):
+        """С If-Modified-Since не новее файла ответ — 304"""
+        path = os.path.join(STATIC_ROOT, self.hashed_css + '.gz')
+        mtime = os.stat(path).st_mtime
+        response = self.get(
+            self.hashed_css, 'gzip', HTTP_IF_MODIFIED_SINCE=http_date(mtime)
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_and_outside_files_pass_through(self):
+        """Неизвестные файлы и пути вне STATIC_ROOT отдаёт не middleware"""
+        for name in ('css/missing.css', '../settings.py'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code, 404)
+
+    def test_accepted_encodings(self):
+        """Разбор Accept-Encoding учитывает q и *"""
+        self.assertEqual(accepted_encodings('gzip;q=0.5'), {'gzip'})
+        self.assertEqual(accepted_encodings('*, gzip;q=0'), {'br'})
+        self.assertEqual(accepted_encodings('identity'), set())
+        self.assertFalse(staticfiles.is_hashed(CSS))
+        self.assertTrue(staticfiles.is_hashed(self.hashed_css))
@@ -0,0 +1,35 @@
+from copy import deepcopy
+
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..templates import template_names, warm_templates
+
+
+def templates_setting(cached):
+    templates = deepcopy(settings.TEMPLATES)
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+class WarmTemplatesTest(SimpleTestCase):
+    @override_settings(TEMPLATES=templates_setting(cached=True))
+    def test_warm_up_fills_cached_loader(self):
+        """Прогрев компилирует все шаблоны проекта в кэш загрузчика"""
+        names = list(template_names(settings.TEMPLATES_DIR))
+        self.assertIn('posts/index.html', names)
+        self.assertEqual(warm_templates(), len(names))
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('posts/index.html', loader.get_template_cache)
+
+    @override_settings(TEMPLATES=templates_setting(cached=False))
+    def test_warm_up_skipped_without_cache(self):
+        """Без кэширующего загрузчика прогревать нечего"""
+        self.assertEqual(warm_templates(), 0)
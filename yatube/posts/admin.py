@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Post, Group
+from .search import filter_posts
 
 
 # Из модуля models импортируем модель Post
@@ -11,6 +12,13 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     list_editable = ('group',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по полнотекстовому индексу, а не через LIKE по всей таблице.
+        # Админке нужны все совпадения, поэтому без лимита поиска.
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
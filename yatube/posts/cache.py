@@ -0,0 +1,266 @@
+"""Кэш отрисованных страниц лент и объектов, к которым они привязаны.
+
+Каждая лента (главная, группа, профиль) имеет версию, и каждая её
+страница — свою. Новый или удалённый пост сдвигает всю ленту и меняет
+версию ленты; правка поста меняет только версию страницы, на которой
+он стоит. Запись страницы хранит версии, с которыми её отрисовали:
+несовпадение версий или истёкший срок делают запись устаревшей.
+В режиме stale-while-revalidate устаревшую страницу перерисовывает
+один запрос, а остальные в это время получают прежний HTML.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
+
+from .models import Group, Post, User
+from .pagination import CursorPaginator
+
+KINDS = ('index', 'group', 'profile')
+STAT_EVENTS = ('hits', 'misses', 'stale')
+
+
+def get_cache():
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+
+def new_version():
+    # Версия из времени, а не с нуля: если ключ версии вытеснят,
+    # старые страницы с прежней версией не оживут.
+    return int(time.time() * 1000)
+
+
+def get_versions(*keys):
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_version(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), timeout=None)
+
+
+def feed_version_key(feed):
+    return f'posts:version:{feed}'
+
+
+def page_version_key(feed, page):
+    return f'posts:version:{feed}:{page}'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def profile_feed(author_id):
+    return f'profile:{author_id}'
+
+
+def lookup_key(kind, value):
+    # В username и slug бывают не-ASCII и спецсимволы, которые
+    # memcached в ключе не примет.
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return f'posts:lookup:{kind}:{digest}'
+
+
+def record(kind, event):
+    cache = get_cache()
+    key = f'posts:stats:{kind}:{event}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def stats():
+    """Счётчики попаданий, промахов и устаревших ответов по видам лент."""
+    keys = [
+        f'posts:stats:{kind}:{event}'
+        for kind in KINDS for event in STAT_EVENTS
+    ]
+    values = get_cache().get_many(keys)
+    return {
+        kind: {
+            event: values.get(f'posts:stats:{kind}:{event}', 0)
+            for event in STAT_EVENTS
+        }
+        for kind in KINDS
+    }
+
+
+def get_page_key(request):
+    """Номер страницы для ключа кэша.
+
+    Страницы по курсору не кэшируются: их граница зависит от токена,
+    и правку поста нельзя сопоставить с конкретной страницей.
+    """
+    if 'cursor' in request.GET:
+        return None
+    page = request.GET.get('page', '1')
+    return page if page.isdigit() and page != '0' else None
+
+
+def get_page_mode(request):
+    """'c' для первой страницы по курсору, '' для нумерованной.
+
+    Строки у них одни, а навигация разная, поэтому HTML хранится
+    под разными ключами, а версия страницы — общая.
+    """
+    if settings.PAGINATION_CURSOR and 'page' not in request.GET:
+        return 'c'
+    return ''
+
+
+class FeedPageCache:
+    """Кэш фрагмента одной страницы ленты `feed`."""
+
+    def __init__(self, kind, feed, page, mode=''):
+        self.kind = kind
+        self.feed = feed
+        self.page = page
+        self.key = f'posts:page:{feed}:{mode}{page}'
+        self.lock_key = f'posts:lock:{feed}:{mode}{page}'
+
+    @classmethod
+    def for_request(cls, request, kind, feed=None):
+        page = get_page_key(request)
+        if page is None:
+            return None
+        return cls(kind, feed or kind, page, get_page_mode(request))
+
+    @cached_property
+    def versions(self):
+        return get_versions(
+            feed_version_key(self.feed),
+            page_version_key(self.feed, self.page),
+        )
+
+    def get(self):
+        """HTML страницы или None, если её нужно отрисовать."""
+        cache = get_cache()
+        entry = cache.get(self.key)
+        if entry is None:
+            record(self.kind, 'misses')
+            return None
+        versions, html, fresh_until = entry
+        if versions == self.versions and time.time() < fresh_until:
+            record(self.kind, 'hits')
+            return html
+        if (
+            settings.POSTS_CACHE_STALE_WHILE_REVALIDATE
+            and not cache.add(
+                self.lock_key, 1, settings.POSTS_CACHE_LOCK_TIMEOUT
+            )
+        ):
+            # Страницу уже перерисовывает другой запрос.
+            record(self.kind, 'stale')
+            return html
+        record(self.kind, 'misses')
+        return None
+
+    def set(self, html):
+        cache = get_cache()
+        timeout = settings.POSTS_CACHE_TIMEOUT
+        entry = (self.versions, html, time.time() + timeout)
+        if settings.POSTS_CACHE_STALE_WHILE_REVALIDATE:
+            timeout += settings.POSTS_CACHE_STALE_TIMEOUT
+        cache.set(self.key, entry, timeout)
+        cache.delete(self.lock_key)
+
+
+def get_cached_object(kind, value, query_set, **lookup):
+    """get_object_or_404 с кэшированием найденного объекта."""
+    cache = get_cache()
+    key = lookup_key(kind, value)
+    obj = cache.get(key)
+    if obj is None:
+        obj = get_object_or_404(query_set, **lookup)
+        cache.set(key, obj, settings.POSTS_CACHE_TIMEOUT)
+    return obj
+
+
+def forget_objects(group_ids=(), author_ids=()):
+    """Убирает из кэша группы и авторов, чьи счётчики изменились."""
+    group_ids = [pk for pk in group_ids if pk is not None]
+    author_ids = [pk for pk in author_ids if pk is not None]
+    keys = []
+    if group_ids:
+        keys += [
+            lookup_key('group', slug) for slug in Group.objects.filter(
+                pk__in=group_ids
+            ).values_list('slug', flat=True)
+        ]
+    if author_ids:
+        keys += [
+            lookup_key('profile', username) for username in
+            User.objects.filter(pk__in=author_ids).values_list(
+                'username', flat=True
+            )
+        ]
+    get_cache().delete_many(keys)
+
+
+def invalidate_feed(feed):
+    bump_version(feed_version_key(feed))
+
+
+def invalidate_page(feed, query_set, post):
+    paginator = CursorPaginator(query_set, settings.COUNT_POSTS)
+    page = paginator.page_number_of(post)
+    bump_version(page_version_key(feed, page))
+
+
+def invalidate_authors(author_ids=(), group_ids=()):
+    """Сбрасывает главную, профили авторов и ленты групп целиком."""
+    invalidate_feed('index')
+    for author_id in author_ids:
+        invalidate_feed(profile_feed(author_id))
+    for group_id in group_ids:
+        invalidate_feed(group_feed(group_id))
+    forget_objects(group_ids=group_ids, author_ids=author_ids)
+
+
+def invalidate_post(post, created=False, deleted=False,
+                    old_author_id=None, old_group_id=None):
+    """Сбрасывает страницы лент, которые показывают или показывали post.
+
+    old_author_id и old_group_id — значения до правки поста.
+    """
+    if created or deleted:
+        old_author_id = old_group_id = None
+    moved_authors = {old_author_id} - {None, post.author_id}
+    moved_groups = {old_group_id} - {None, post.group_id}
+    if created or deleted:
+        invalidate_feed('index')
+    else:
+        invalidate_page('index', Post.objects.all(), post)
+    feeds = [(profile_feed(post.author_id), post.author_id, 'author')]
+    if post.group_id is not None:
+        feeds.append((group_feed(post.group_id), post.group_id, 'group'))
+    for feed, pk, field in feeds:
+        moved = moved_authors if field == 'author' else moved_groups
+        if created or deleted or moved:
+            invalidate_feed(feed)
+        else:
+            invalidate_page(feed, Post.objects.filter(**{field: pk}), post)
+    for author_id in moved_authors:
+        invalidate_feed(profile_feed(author_id))
+    for group_id in moved_groups:
+        invalidate_feed(group_feed(group_id))
+    if created or deleted or moved_authors or moved_groups:
+        forget_objects(
+            group_ids={post.group_id} | moved_groups,
+            author_ids={post.author_id} | moved_authors,
+        )
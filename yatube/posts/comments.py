@@ -0,0 +1,116 @@
+"""Комментарии: ветки обсуждения и превью в лентах.
+
+Страница обсуждения поста читается одним запросом по индексу
+(post, path) и листается курсорами CursorPaginator, поэтому глубокая
+или длинная ветка стоит столько же, сколько короткая. Лентам нужны
+последние COMMENTS_PREVIEW комментариев каждого поста — они читаются
+одним запросом на страницу, а число комментариев хранится в самом
+посте.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .cache import invalidate_post
+from .counters import change_author_count, change_group_count
+from .models import FEED_DEFERRED_FIELDS, Comment, Post
+from .pagination import CursorPage, CursorPaginator
+
+# Ширина id в path: строки сравниваются так же, как числа.
+PATH_DIGITS = 10
+AUTHOR_DEFERRED_FIELDS = [
+    field for field in FEED_DEFERRED_FIELDS if field.startswith('author__')
+]
+
+
+def comment_path(comment, parent_path=None):
+    segment = str(comment.pk).zfill(PATH_DIGITS)
+    return f'{parent_path}/{segment}' if parent_path else segment
+
+
+def reply_parent(parent):
+    """Комментарий, под которым встанет ответ на parent.
+
+    Глубже COMMENTS_MAX_DEPTH ответы не вкладываются, а встают рядом
+    с parent — path не вырастает за длину поля.
+    """
+    while (
+        parent is not None
+        and parent.depth + 1 >= settings.COMMENTS_MAX_DEPTH
+    ):
+        parent = parent.parent
+    return parent
+
+
+def set_path(comment):
+    """Заполняет path только что созданного комментария."""
+    parent_path = None
+    if comment.parent_id is not None:
+        parent_path = Comment.objects.filter(
+            pk=comment.parent_id
+        ).values_list('path', flat=True).first()
+    comment.path = comment_path(comment, parent_path)
+    Comment.objects.filter(pk=comment.pk).update(path=comment.path)
+
+
+def comments_changed(post_id, delta=0):
+    """Меняет счётчик комментариев поста и сбрасывает его страницы.
+
+    Отметки изменения у поста, автора и группы меняют ETag страниц,
+    а версии фрагментов — кэш лент, где стоит пост.
+    """
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta,
+        updated_at=timezone.now(),
+    )
+    post = Post.objects.filter(pk=post_id).only(
+        'pub_date', 'author', 'group'
+    ).first()
+    if post is None:
+        return
+    change_author_count(post.author_id, 0)
+    change_group_count(post.group_id, 0)
+    invalidate_post(post)
+
+
+def thread_page(post, cursor=None):
+    """Страница обсуждения поста в порядке веток.
+
+    Число записей берётся из счётчика поста, без COUNT(*); для поста
+    без комментариев запроса нет совсем.
+    """
+    paginator = CursorPaginator(
+        post.comments.select_related('author')
+        .defer(*AUTHOR_DEFERRED_FIELDS).order_by('path'),
+        settings.COMMENTS_PER_PAGE,
+    )
+    paginator.count = post.comments_count
+    if not post.comments_count:
+        return CursorPage(paginator, lambda: ([], None, None))
+    return paginator.get_cursor_page(cursor)
+
+
+def latest_comments(posts):
+    """Последние комментарии постов: {id поста: [комментарии по времени]}.
+
+    Один запрос на все посты: коррелированный подзапрос с LIMIT
+    выбирает по индексу (post, created) не больше COMMENTS_PREVIEW
+    комментариев каждого поста. Посты без комментариев не читаются.
+    """
+    ids = [post.pk for post in posts if post.comments_count]
+    if not ids or not settings.COMMENTS_PREVIEW:
+        return {}
+    latest = Comment.objects.filter(
+        post_id=OuterRef('post_id')
+    ).order_by('-created', '-id').values('pk')[:settings.COMMENTS_PREVIEW]
+    comments = (
+        Comment.objects.filter(post_id__in=ids, pk__in=Subquery(latest))
+        .select_related('author').defer(*AUTHOR_DEFERRED_FIELDS)
+        .order_by('created', 'id')
+    )
+    result = defaultdict(list)
+    for comment in comments:
+        result[comment.post_id].append(comment)
+    return result
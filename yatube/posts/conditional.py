@@ -0,0 +1,118 @@
+"""Условные GET-запросы (ETag / Last-Modified) для страниц постов.
+
+Состояние страницы берётся из денормализованных отметок
+`posts_changed_at` и счётчиков, которые ведут сигналы, поэтому
+проверка стоит один короткий запрос и не трогает ленту постов.
+Тот же ETag служит ключом кэша сжатых страниц (core.compression).
+"""
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from core import compression
+
+from .models import AuthorStat, Follow, Group, Post, User
+
+
+def index_state(request):
+    changed_at = AuthorStat.objects.aggregate(
+        changed_at=Max('posts_changed_at')
+    )['changed_at']
+    return changed_at, ()
+
+
+def group_state(request, slug):
+    row = Group.objects.filter(slug=slug).values_list(
+        'posts_changed_at', 'posts_count', 'title', 'description'
+    ).first()
+    if row is None:
+        return None
+    return row[0], row[1:]
+
+
+def profile_state(request, username):
+    row = User.objects.filter(username=username).values_list(
+        'post_stat__posts_changed_at', 'post_stat__posts_count',
+        'first_name', 'last_name',
+    ).first()
+    if row is None:
+        return None
+    parts = row[1:]
+    if request.user.is_authenticated:
+        # Кнопка «Подписаться» или «Отписаться».
+        parts += (Follow.objects.filter(
+            user=request.user, author__username=username
+        ).exists(),)
+    return row[0], parts
+
+
+def post_state(request, post_id):
+    row = Post.objects.filter(pk=post_id).values_list(
+        'updated_at', 'author__post_stat__posts_changed_at',
+        'author__post_stat__posts_count', 'author__first_name',
+        'author__last_name', 'group__title', 'group__slug',
+    ).first()
+    if row is None:
+        return None
+    changed_at = max(filter(None, row[:2]), default=None)
+    parts = row[2:]
+    if request.user.is_authenticated:
+        # В форме комментария — CSRF-токен из cookie этого браузера.
+        parts += (request.COOKIES.get(settings.CSRF_COOKIE_NAME),)
+    return changed_at, parts
+
+
+def make_etag(request, changed_at, parts):
+    # Шапка страницы зависит от пользователя, ссылки — от параметров.
+    source = '|'.join(str(part) for part in (
+        request.get_full_path(),
+        request.user.pk,
+        changed_at.isoformat() if changed_at else '',
+        *parts,
+    ))
+    return quote_etag(hashlib.md5(source.encode()).hexdigest())
+
+
+def conditional_page(state_func):
+    """Отвечает 304 Not Modified, не вызывая view, если страница не менялась.
+
+    state_func(request, *args, **kwargs) возвращает пару
+    (время последнего изменения, прочие значения для ETag)
+    или None, если объекта нет — тогда решает сама view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            state = state_func(request, *args, **kwargs)
+            if state is None:
+                return view(request, *args, **kwargs)
+            changed_at, parts = state
+            etag = make_etag(request, changed_at, parts)
+            last_modified = (
+                timegm(changed_at.utctimetuple()) if changed_at else None
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = compression.cached_page(request, etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                # CompressionMiddleware сохранит сжатую страницу.
+                response.page_etag = etag
+            if response.status_code in (200, 304):
+                response.setdefault('ETag', etag)
+                if last_modified:
+                    response.setdefault(
+                        'Last-Modified', http_date(last_modified)
+                    )
+            return response
+        return inner
+    return decorator
@@ -0,0 +1,161 @@
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import AuthorStat, Comment, Follow, Group, Post, User
+
+
+def change_author_count(user_id, delta):
+    """Меняет счётчик автора и отмечает время изменения его постов.
+
+    delta=0 только отмечает время — для правки поста.
+    """
+    now = timezone.now()
+    updated = AuthorStat.objects.filter(user_id=user_id).update(
+        posts_count=F('posts_count') + delta, posts_changed_at=now
+    )
+    if not updated and delta > 0:
+        # Строки счётчика нет — считаем честно один раз.
+        AuthorStat.objects.get_or_create(
+            user_id=user_id,
+            defaults={
+                'posts_count': Post.objects.filter(author_id=user_id).count(),
+                'posts_changed_at': now,
+            }
+        )
+
+
+def change_group_count(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') + delta,
+            posts_changed_at=timezone.now(),
+        )
+
+
+def touch_posts(author_ids=(), group_ids=()):
+    """Отмечает время изменения постов авторов и групп без пересчёта.
+
+    Для изменений, которые меняют вид постов в лентах, но не их число:
+    удаление группы, новое имя автора.
+    """
+    now = timezone.now()
+    AuthorStat.objects.filter(user_id__in=author_ids).update(
+        posts_changed_at=now
+    )
+    Group.objects.filter(pk__in=group_ids).update(posts_changed_at=now)
+
+
+def change_followers_count(user_id, delta):
+    """Меняет число подписчиков автора и возвращает новое."""
+    updated = AuthorStat.objects.filter(user_id=user_id).update(
+        followers_count=F('followers_count') + delta
+    )
+    if not updated and delta > 0:
+        AuthorStat.objects.get_or_create(
+            user_id=user_id,
+            defaults={
+                'posts_count': Post.objects.filter(author_id=user_id).count(),
+                'followers_count': Follow.objects.filter(
+                    author_id=user_id
+                ).count(),
+            }
+        )
+    return AuthorStat.objects.filter(user_id=user_id).values_list(
+        'followers_count', flat=True
+    ).first()
+
+
+def recount_posts(author_ids=(), group_ids=(), batch_size=1000):
+    """Пересчитывает счётчики постов только указанных авторов и групп.
+
+    Для массовой вставки: цена зависит от пачки, а не от всей базы.
+    Время изменения постов у них тоже обновляется.
+    """
+    now = timezone.now()
+    author_ids = set(author_ids)
+    group_ids = set(group_ids) - {None}
+    by_author = dict(
+        Post.objects.filter(author_id__in=author_ids).order_by()
+        .values_list('author').annotate(count=Count('pk'))
+    )
+    missing = author_ids - set(
+        AuthorStat.objects.filter(user_id__in=author_ids)
+        .values_list('user_id', flat=True)
+    )
+    by_followed = dict(
+        Follow.objects.filter(author_id__in=missing).order_by()
+        .values_list('author').annotate(count=Count('pk'))
+    )
+    AuthorStat.objects.bulk_create(
+        AuthorStat(
+            user_id=user_id, followers_count=by_followed.get(user_id, 0)
+        )
+        for user_id in missing
+    )
+    stats = list(AuthorStat.objects.filter(user_id__in=author_ids))
+    for stat in stats:
+        stat.posts_count = by_author.get(stat.user_id, 0)
+        stat.posts_changed_at = now
+    AuthorStat.objects.bulk_update(
+        stats, ['posts_count', 'posts_changed_at'], batch_size=batch_size
+    )
+    by_group = dict(
+        Post.objects.filter(group_id__in=group_ids).order_by()
+        .values_list('group').annotate(count=Count('pk'))
+    )
+    groups = list(Group.objects.filter(pk__in=group_ids).only('pk'))
+    for group in groups:
+        group.posts_count = by_group.get(group.pk, 0)
+        group.posts_changed_at = now
+    Group.objects.bulk_update(
+        groups, ['posts_count', 'posts_changed_at'], batch_size=batch_size
+    )
+    return len(stats), len(groups)
+
+
+def rebuild_counters(batch_size=1000):
+    """Пересчитывает все счётчики постов пакетными запросами.
+
+    Возвращает число обновлённых авторов и групп.
+    """
+    by_author = dict(
+        Post.objects.order_by().values_list('author')
+        .annotate(count=Count('pk'))
+    )
+    by_followed = dict(
+        Follow.objects.order_by().values_list('author')
+        .annotate(count=Count('pk'))
+    )
+    by_group = dict(
+        Post.objects.order_by().exclude(group=None).values_list('group')
+        .annotate(count=Count('pk'))
+    )
+    # Размер пакета вставки bulk_create выбирает сам под лимиты СУБД.
+    AuthorStat.objects.bulk_create(
+        AuthorStat(user_id=user_id)
+        for user_id in User.objects.filter(post_stat=None)
+        .values_list('pk', flat=True).iterator()
+    )
+    stats = list(AuthorStat.objects.all())
+    for stat in stats:
+        stat.posts_count = by_author.get(stat.user_id, 0)
+        stat.followers_count = by_followed.get(stat.user_id, 0)
+    AuthorStat.objects.bulk_update(
+        stats, ['posts_count', 'followers_count'], batch_size=batch_size
+    )
+    groups = list(Group.objects.only('pk'))
+    for group in groups:
+        group.posts_count = by_group.get(group.pk, 0)
+    Group.objects.bulk_update(
+        groups, ['posts_count'], batch_size=batch_size
+    )
+    by_post = (
+        Comment.objects.order_by().values_list('post')
+        .annotate(count=Count('pk'))
+    )
+    Post.objects.exclude(comments_count=0).update(comments_count=0)
+    Post.objects.bulk_update(
+        [Post(pk=pk, comments_count=count) for pk, count in by_post],
+        ['comments_count'], batch_size=batch_size,
+    )
+    return len(stats), len(groups)
@@ -0,0 +1,247 @@
+"""Материализованные первые страницы лент.
+
+Для главной и для каждой группы таблица FeedEntry хранит первые
+POSTS_FEED_PAGES страниц ленты: id поста и его дату публикации.
+Эти страницы читаются по индексу FeedEntry и первичному ключу постов,
+без обхода posts_post в порядке ленты. Сигналы ведут таблицу при
+создании, смене группы и удалении поста; массовые вставки (импорт,
+наполнение) перестраивают её через rebuild_feeds(), а check_feeds()
+сверяет её с живым запросом.
+"""
+from django.conf import settings
+from django.db.models import F, Q
+
+from .cache import group_feed
+from .models import FeedEntry, Group, Post
+
+INDEX_FEED = 'index'
+
+
+def feed_size():
+    # Лишняя запись показывает, есть ли страница после последней.
+    return settings.POSTS_FEED_PAGES * settings.COUNT_POSTS + 1
+
+
+def post_feeds(group_id):
+    """Материализованные ленты, в которые попадает пост."""
+    if group_id is None:
+        return [INDEX_FEED]
+    return [INDEX_FEED, group_feed(group_id)]
+
+
+def all_feeds():
+    return [INDEX_FEED] + [
+        group_feed(pk) for pk in Group.objects.values_list('pk', flat=True)
+    ]
+
+
+def live_posts(feed):
+    """Посты ленты в её порядке — то, что таблица материализует."""
+    posts = Post.objects.order_by('-pub_date', '-pk')
+    if feed != INDEX_FEED:
+        posts = posts.filter(group_id=int(feed.split(':', 1)[1]))
+    return posts
+
+
+def entries(feed):
+    return FeedEntry.objects.filter(feed=feed).order_by(
+        '-pub_date', '-post_id'
+    )
+
+
+def older_than(pub_date, post_id, prefix='', id_field=None):
+    """Условие «запись идёт в ленте после (pub_date, post_id)».
+
+    `id_field` — поле id поста, если это не 'pk' и не prefix + 'post_id'.
+    """
+    if id_field is None:
+        id_field = prefix + 'post_id' if prefix else 'pk'
+    return Q(**{prefix + 'pub_date__lte': pub_date}) & (
+        Q(**{prefix + 'pub_date__lt': pub_date})
+        | Q(**{prefix + 'pub_date': pub_date, id_field + '__lt': post_id})
+    )
+
+
+def trim(feed):
+    extra = list(entries(feed).values_list('pk', flat=True)[feed_size():])
+    if extra:
+        FeedEntry.objects.filter(pk__in=extra).delete()
+
+
+def fill(feed):
+    """Дополняет ленту постами, освободившими место после удаления."""
+    size = feed_size()
+    stored = list(entries(feed).values_list('pub_date', 'post'))
+    if not stored:
+        rebuild_feeds([feed])
+        return
+    if len(stored) >= size:
+        return
+    posts = live_posts(feed).filter(older_than(*stored[-1]))
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(feed=feed, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts.values_list('pk', 'pub_date')[
+                :size - len(stored)
+            ]
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def add_to_feed(feed, post):
+    size = feed_size()
+    stored = list(entries(feed).values_list('pub_date', 'post')[:size])
+    if not stored:
+        # Ленту ещё не строили (или она была пуста) — строим целиком,
+        # иначе единственная запись выдала бы её за полную.
+        rebuild_feeds([feed])
+        return
+    full = len(stored) >= size
+    if full and (post.pub_date, post.pk) < stored[-1]:
+        # Пост старше последней материализованной записи.
+        return
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(feed=feed, post_id=post.pk, pub_date=post.pub_date)],
+        ignore_conflicts=True,
+    )
+    if full:
+        trim(feed)
+
+
+def add_to_feeds(post):
+    if settings.POSTS_FEED_PAGES:
+        for feed in post_feeds(post.group_id):
+            add_to_feed(feed, post)
+
+
+def move_between_feeds(post, old_group_id):
+    """Переносит пост из ленты прежней группы в ленту новой."""
+    if not settings.POSTS_FEED_PAGES or old_group_id == post.group_id:
+        return
+    if old_group_id is not None:
+        feed = group_feed(old_group_id)
+        FeedEntry.objects.filter(feed=feed, post_id=post.pk).delete()
+        fill(feed)
+    if post.group_id is not None:
+        add_to_feed(group_feed(post.group_id), post)
+
+
+def remove_from_feeds(post):
+    """Занимает место удалённого поста следующими постами лент.
+
+    Сами записи удалённого поста удаляет каскад.
+    """
+    if settings.POSTS_FEED_PAGES:
+        for feed in post_feeds(post.group_id):
+            fill(feed)
+
+
+def drop_feed(feed):
+    FeedEntry.objects.filter(feed=feed).delete()
+
+
+def rebuild_feeds(feeds=None):
+    """Перестраивает ленты заново по живым запросам.
+
+    Возвращает число лент и записей в них.
+    """
+    size = feed_size() if settings.POSTS_FEED_PAGES else 0
+    if feeds is None:
+        feeds = all_feeds()
+        # Ленты удалённых групп.
+        FeedEntry.objects.exclude(feed__in=feeds).delete()
+    total = 0
+    for feed in feeds:
+        drop_feed(feed)
+        rows = live_posts(feed).values_list('pk', 'pub_date')[:size]
+        created = FeedEntry.objects.bulk_create(
+            FeedEntry(feed=feed, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in rows
+        )
+        total += len(created)
+    return len(feeds), total
+
+
+def check_feeds():
+    """Расхождения таблицы с живыми запросами лент.
+
+    Для каждой неверной ленты — словарь с отсутствующими, лишними
+    и устаревшими постами.
+    """
+    size = feed_size() if settings.POSTS_FEED_PAGES else 0
+    feeds = all_feeds()
+    problems = []
+    for feed in feeds:
+        live = list(live_posts(feed).values_list('pk', 'pub_date')[:size])
+        stored = list(entries(feed).values_list('post', 'pub_date'))
+        if live == stored:
+            continue
+        live_ids = [pk for pk, _ in live]
+        stored_ids = [pk for pk, _ in stored]
+        problems.append({
+            'feed': feed,
+            'missing': sorted(set(live_ids) - set(stored_ids)),
+            'extra': sorted(set(stored_ids) - set(live_ids)),
+            # Пост есть в обоих списках, но дата публикации другая.
+            'stale': sorted(
+                pk for pk, _ in set(live) ^ set(stored)
+                if pk in live_ids and pk in stored_ids
+            ),
+        })
+    orphans = (
+        FeedEntry.objects.exclude(feed__in=feeds)
+        .order_by('feed').values_list('feed', flat=True).distinct()
+    )
+    for feed in orphans:
+        stored_ids = FeedEntry.objects.filter(feed=feed).values_list(
+            'post', flat=True
+        )
+        problems.append({
+            'feed': feed, 'missing': [], 'extra': sorted(stored_ids),
+            'stale': [],
+        })
+    return problems
+
+
+class MaterializedFeed:
+    """Чтение страниц ленты через FeedEntry для CursorPaginator."""
+    ordering = ['-pub_date', '-id']
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f'<MaterializedFeed {self.name}>'
+
+    @classmethod
+    def get(cls, name):
+        return cls(name) if settings.POSTS_FEED_PAGES else None
+
+    def rows(self, query_set, key=None, offset=0, limit=1, count=None):
+        """limit постов после key (или с offset) из query_set.
+
+        Возвращает None, если таблица эти посты не покрывает: лента
+        длиннее материализованной части или ещё не построена.
+        `count` — известное число постов ленты, с ним короткой ленте
+        не нужен подсчёт записей таблицы.
+        """
+        # Одно условие filter(), чтобы JOIN к FeedEntry был один.
+        condition = Q(feed_entries__feed=self.name)
+        if key is not None:
+            condition &= older_than(*key, prefix='feed_entries__')
+        # F(), а не строки: по строке 'feed_entries__post_id' Django
+        # подставил бы сортировку Post из Meta, и SQLite сортировал бы
+        # выборку вместо чтения индекса feed_entry_order_idx.
+        rows = list(
+            query_set.filter(condition).order_by(
+                F('feed_entries__pub_date').desc(),
+                F('feed_entries__post_id').desc(),
+            )[offset:offset + limit]
+        )
+        if len(rows) < limit:
+            if not rows or count is None:
+                count = FeedEntry.objects.filter(feed=self.name).count()
+            if not count or count >= feed_size():
+                return None
+        return rows
@@ -0,0 +1,285 @@
+"""Лента подписок: посты авторов, на которых подписан пользователь.
+
+Стратегия выбирается настройкой POSTS_FOLLOW_FEED:
+
+* 'read' — fan-out on read: при запросе из индекса (author, pub_date)
+  читаются последние посты каждого автора подписок, и списки
+  сливаются k-путевым слиянием;
+* 'write' — fan-out on write: новый пост сразу раскладывается
+  во входящие (InboxEntry) подписчиков автора, и страница читается
+  по индексу входящих. Посты авторов, у которых подписчиков больше
+  POSTS_FOLLOW_FANOUT_LIMIT, не раскладываются — их дочитывают
+  при чтении, как при 'read', и сливают со входящими.
+
+Входящие держат первые посты ленты: всё, что новее самой старой
+записи, в них есть. Дальше этой записи, в том числе после обрезки
+до POSTS_FOLLOW_INBOX_SIZE (trim_inboxes), страницы читаются как
+при 'read'.
+"""
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+
+from .feeds import older_than
+from .models import AuthorStat, Follow, InboxEntry, Post
+
+READ = 'read'
+WRITE = 'write'
+
+
+def fans_out_on_write():
+    return settings.POSTS_FOLLOW_FEED == WRITE
+
+
+def is_heavy(author_id):
+    """Посты автора не раскладываются: у него слишком много подписчиков."""
+    return AuthorStat.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.POSTS_FOLLOW_FANOUT_LIMIT,
+    ).exists()
+
+
+def followed_authors(user_id, heavy=None):
+    """Авторы подписок; heavy=True — только с большим числом подписчиков,
+    heavy=False — только остальные."""
+    follows = Follow.objects.filter(user_id=user_id)
+    condition = Q(
+        author__post_stat__followers_count__gt=(
+            settings.POSTS_FOLLOW_FANOUT_LIMIT
+        )
+    )
+    if heavy is True:
+        follows = follows.filter(condition)
+    elif heavy is False:
+        follows = follows.exclude(condition)
+    return list(follows.values_list('author_id', flat=True))
+
+
+def author_keys(author_id, key, limit):
+    """(pub_date, id, автор) последних limit постов автора после key.
+
+    Читаются по индексу post_author_feed_idx без сортировки.
+    """
+    posts = Post.objects.filter(author_id=author_id)
+    if key is not None:
+        posts = posts.filter(older_than(*key))
+    return list(
+        posts.order_by('-pub_date', '-pk')
+        .values_list('pub_date', 'pk', 'author_id')[:limit]
+    )
+
+
+def merge_keys(lists):
+    """k-путевое слияние списков ключей, отсортированных по убыванию.
+
+    Пост, попавший и во входящие, и в посты автора, идёт один раз.
+    """
+    last = None
+    for key in heapq.merge(*lists, reverse=True):
+        if key[1] != last:
+            last = key[1]
+            yield key
+
+
+def load_posts(query_set, keys):
+    posts = query_set.in_bulk([pk for _, pk, _ in keys])
+    return [posts[pk] for _, pk, _ in keys if pk in posts]
+
+
+class FanOutOnRead:
+    """Страницы ленты подписок слиянием постов авторов."""
+    ordering = ['-pub_date', '-id']
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.user_id}>'
+
+    def keys(self, key, count, authors=None):
+        if authors is None:
+            authors = followed_authors(self.user_id)
+        return list(islice(
+            merge_keys(author_keys(author, key, count) for author in authors),
+            count,
+        ))
+
+    def rows(self, query_set, key=None, offset=0, limit=1, count=None):
+        """limit постов после key (или с offset) — интерфейс
+        MaterializedFeed для CursorPaginator."""
+        keys = self.keys(key, offset + limit)[offset:]
+        return load_posts(query_set, keys)
+
+
+class FanOutOnWrite(FanOutOnRead):
+    """Страницы из входящих, слитых с постами «тяжёлых» авторов."""
+
+    def rows(self, query_set, key=None, offset=0, limit=1, count=None):
+        needed = offset + limit
+        entries = InboxEntry.objects.filter(user_id=self.user_id)
+        if key is not None:
+            entries = entries.filter(older_than(*key, id_field='post_id'))
+        inbox = list(
+            entries.order_by('-pub_date', '-post_id')
+            .values_list('pub_date', 'post_id', 'author_id')[:needed]
+        )
+        if len(inbox) < needed:
+            # Страница заходит за последнюю запись входящих.
+            return super().rows(query_set, key, offset, limit, count)
+        boundary = inbox[-1]
+        pulled = [
+            [row for row in author_keys(author, key, needed)
+             if row >= boundary]
+            for author in followed_authors(self.user_id, heavy=True)
+        ]
+        keys = list(islice(merge_keys([inbox, *pulled]), needed))
+        return load_posts(query_set, keys[offset:])
+
+
+STRATEGIES = {READ: FanOutOnRead, WRITE: FanOutOnWrite}
+
+
+def get_follow_feed(user_id):
+    return STRATEGIES[settings.POSTS_FOLLOW_FEED](user_id)
+
+
+def push_post(post):
+    """Раскладывает новый пост во входящие подписчиков автора.
+
+    Одна вставка INSERT ... SELECT по подписчикам, без чтения их
+    в Python. Возвращает число записей.
+    """
+    if not fans_out_on_write() or is_heavy(post.author_id):
+        return 0
+    inbox = connection.ops.quote_name(InboxEntry._meta.db_table)
+    follow = connection.ops.quote_name(Follow._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {inbox} (user_id, post_id, author_id, pub_date) '
+            f'SELECT user_id, %s, %s, %s FROM {follow} '
+            f'WHERE author_id = %s',
+            [
+                post.pk, post.author_id,
+                connection.ops.adapt_datetimefield_value(post.pub_date),
+                post.author_id,
+            ],
+        )
+        return cursor.rowcount
+
+
+def trim_inbox(user_id):
+    extra = list(
+        InboxEntry.objects.filter(user_id=user_id)
+        .order_by('-pub_date', '-post_id')
+        .values_list('pk', flat=True)[settings.POSTS_FOLLOW_INBOX_SIZE:]
+    )
+    if extra:
+        InboxEntry.objects.filter(pk__in=extra).delete()
+    return len(extra)
+
+
+def trim_inboxes():
+    """Обрезает переполненные входящие до POSTS_FOLLOW_INBOX_SIZE.
+
+    Раскладка поста входящие не обрезает — иначе публикация автора
+    с тысячами подписчиков стоила бы тысячи удалений. Возвращает
+    число обрезанных входящих и удалённых записей.
+    """
+    users = list(
+        InboxEntry.objects.order_by().values('user')
+        .annotate(count=Count('pk'))
+        .filter(count__gt=settings.POSTS_FOLLOW_INBOX_SIZE)
+        .values_list('user', flat=True)
+    )
+    return len(users), sum(trim_inbox(user_id) for user_id in users)
+
+
+def backfill(user_id, author_id):
+    """Добавляет во входящие user_id посты автора после подписки.
+
+    Только посты новее самой старой записи входящих: за ней может
+    не хватать постов других авторов, и те страницы всё равно
+    читаются слиянием.
+    """
+    if not fans_out_on_write() or is_heavy(author_id):
+        return 0
+    oldest = (
+        InboxEntry.objects.filter(user_id=user_id)
+        .order_by('pub_date', 'post_id')
+        .values_list('pub_date', 'post_id').first()
+    )
+    posts = Post.objects.filter(author_id=author_id)
+    if oldest is not None:
+        posts = posts.exclude(older_than(*oldest))
+    created = InboxEntry.objects.bulk_create(
+        [
+            InboxEntry(
+                user_id=user_id, post_id=pk, author_id=author_id,
+                pub_date=pub_date,
+            )
+            for pk, pub_date in posts.order_by('-pub_date', '-pk')
+            .values_list('pk', 'pub_date')[
+                :settings.POSTS_FOLLOW_INBOX_SIZE
+            ]
+        ],
+        ignore_conflicts=True,
+    )
+    trim_inbox(user_id)
+    return len(created)
+
+
+def follow_added(follow):
+    backfill(follow.user_id, follow.author_id)
+
+
+def follow_removed(follow, followers_count):
+    """Убирает посты автора из входящих отписавшегося.
+
+    Если автор только что перестал быть «тяжёлым», его посты
+    раскладываются оставшимся подписчикам.
+    """
+    if not fans_out_on_write():
+        return
+    InboxEntry.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id
+    ).delete()
+    if followers_count == settings.POSTS_FOLLOW_FANOUT_LIMIT:
+        for user_id in Follow.objects.filter(
+            author_id=follow.author_id
+        ).values_list('user_id', flat=True):
+            backfill(user_id, follow.author_id)
+
+
+def rebuild_inboxes(user_ids=None):
+    """Собирает входящие заново из подписок.
+
+    Нужна после массовой вставки постов и при переходе на 'write'.
+    Возвращает число входящих и записей в них.
+    """
+    if user_ids is None:
+        InboxEntry.objects.all().delete()
+        user_ids = Follow.objects.order_by('user_id').values_list(
+            'user_id', flat=True
+        ).distinct()
+    user_ids = list(user_ids)
+    total = 0
+    if not fans_out_on_write():
+        return len(user_ids), total
+    for user_id in user_ids:
+        InboxEntry.objects.filter(user_id=user_id).delete()
+        keys = FanOutOnRead(user_id).keys(
+            None, settings.POSTS_FOLLOW_INBOX_SIZE,
+            authors=followed_authors(user_id, heavy=False),
+        )
+        created = InboxEntry.objects.bulk_create(
+            InboxEntry(
+                user_id=user_id, post_id=pk, author_id=author_id,
+                pub_date=pub_date,
+            )
+            for pub_date, pk, author_id in keys
+        )
+        total += len(created)
+    return len(user_ids), total
@@ -1,8 +1,21 @@
 from django import forms
-from .models import Post
+from .models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ('text', 'group')
+        fields = ('text', 'group', 'image')
+
+
+class CommentForm(forms.ModelForm):
+    def __init__(self, *args, post=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if post is not None:
+            # Отвечать можно только на комментарии того же поста.
+            self.fields['parent'].queryset = post.comments.all()
+
+    class Meta:
+        model = Comment
+        fields = ('text', 'parent')
+        widgets = {'parent': forms.HiddenInput}
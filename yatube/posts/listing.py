@@ -0,0 +1,105 @@
+"""Строки лент для шаблонов.
+
+Раньше шаблон ленты на каждый пост вызывал get_full_name автора
+и делал два-три {% url %}. Строки считают имя автора и ссылки один
+раз на автора и группу страницы, а сам reverse() запоминается между
+запросами: ссылка зависит только от имени маршрута и аргументов.
+"""
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.functional import cached_property
+
+from .comments import latest_comments
+from .thumbnails import page_thumbnails
+
+
+@lru_cache(maxsize=4096)
+def _reverse(viewname, args, urlconf, prefix):
+    return reverse(viewname, args=args, urlconf=urlconf)
+
+
+def cached_reverse(viewname, *args):
+    """reverse() с памятью на набор маршрутов и префикс скрипта."""
+    return _reverse(viewname, args, get_urlconf(), get_script_prefix())
+
+
+@receiver(setting_changed)
+def urlconf_changed(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _reverse.cache_clear()
+
+
+class PostRow:
+    """Пост ленты с готовыми именем автора, ссылками, миниатюрами
+    и последними комментариями."""
+    __slots__ = (
+        'post', 'author_name', 'profile_url', 'url', 'group_url', 'image',
+        'comments',
+    )
+
+    def __init__(
+        self, post, author_name, profile_url, url, group_url, image=None,
+        comments=(),
+    ):
+        self.post = post
+        self.author_name = author_name
+        self.profile_url = profile_url
+        self.url = url
+        self.group_url = group_url
+        self.image = image
+        self.comments = comments
+
+    def __repr__(self):
+        return f'<PostRow {self.post.pk}>'
+
+
+def post_rows(posts):
+    posts = list(posts)
+    images = page_thumbnails(posts)
+    comments = latest_comments(posts)
+    authors = {}
+    group_urls = {}
+    rows = []
+    for post in posts:
+        author = authors.get(post.author_id)
+        if author is None:
+            author = authors[post.author_id] = (
+                post.author.get_full_name(),
+                cached_reverse('posts:profile', post.author.username),
+            )
+        group_url = None
+        if post.group_id is not None:
+            group_url = group_urls.get(post.group_id)
+            if group_url is None:
+                group_url = group_urls[post.group_id] = cached_reverse(
+                    'posts:group_list', post.group.slug
+                )
+        rows.append(PostRow(
+            post, *author, cached_reverse('posts:post_detail', post.pk),
+            group_url, images.get(post.pk), comments.get(post.pk, ()),
+        ))
+    return rows
+
+
+class PageRows:
+    """Строки страницы ленты.
+
+    Посты читаются только при обходе, поэтому закэшированный
+    фрагмент ленты страницу по-прежнему не загружает.
+    """
+
+    def __init__(self, page):
+        self.page = page
+
+    @cached_property
+    def rows(self):
+        return post_rows(self.page)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
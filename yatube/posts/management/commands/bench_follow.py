@@ -0,0 +1,200 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+
+from core.benchmark import benchmark_database, measure, summarize
+from posts.cache import get_cache
+from posts.counters import rebuild_counters
+from posts.following import rebuild_inboxes
+from posts.models import Follow, InboxEntry, Post, User
+from posts.seeding import seed_posts
+
+
+def count_queries(func):
+    # CaptureQueriesContext не годится: тестовый клиент в начале
+    # запроса очищает connection.queries.
+    queries = []
+
+    def counter(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+    with connection.execute_wrapper(counter):
+        func()
+    return len(queries)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает ленту подписок при раскладке на чтении, на записи '
+        'и в гибриде: цену публикации поста автором с тысячами '
+        'подписчиков и чтения первой и дальней страниц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--followers', type=int, default=10000)
+        parser.add_argument('--authors', type=int, default=10)
+        parser.add_argument(
+            '--heavy', type=int, default=2,
+            help='Сколько авторов с вдвое большим числом подписчиков',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=50, help='Постов на автора'
+        )
+        parser.add_argument('--readers', type=int, default=10)
+        parser.add_argument('--depth', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def create_data(self, options):
+        followers = options['followers']
+        authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(options['authors'] + options['heavy'])
+        ]
+        User.objects.bulk_create(
+            (
+                User(username=f'follower{number}', password='!')
+                for number in range(followers * 2)
+            )
+        )
+        users = list(
+            User.objects.filter(username__startswith='follower')
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        # Каждого автора читают followers человек, «тяжёлых» —
+        # ещё столько же.
+        Follow.objects.bulk_create(
+            (
+                Follow(user_id=user_id, author=author)
+                for index, author in enumerate(authors)
+                for user_id in users[
+                    :followers * (2 if index >= options['authors'] else 1)
+                ]
+            )
+        )
+        seed_posts(
+            options['posts'] * len(authors), [user.pk for user in authors],
+            [],
+        )
+        rebuild_counters()
+        return authors, users[:options['readers']]
+
+    def measure_publish(self, author, repeat):
+        return summarize(measure(
+            lambda: Post.objects.create(author=author, text='Новый пост'),
+            repeat,
+        ))
+
+    def measure_reads(self, readers, depth, repeat):
+        """Первая страница и страница depth, пройденная по курсорам.
+
+        Если у кого-то из читателей лента короче, все замеряют самую
+        дальнюю страницу, до которой дошёл каждый.
+        """
+        clients = []
+        for reader in User.objects.filter(pk__in=readers):
+            client = Client()
+            client.force_login(reader)
+            clients.append(client)
+        url = reverse('posts:follow_index')
+        paths = []
+        for client in clients:
+            path = []
+            for _ in range(depth - 1):
+                page_obj = client.get(
+                    url, {'cursor': path[-1]} if path else {}
+                ).context['page_obj']
+                if not page_obj.has_next():
+                    break
+                path.append(page_obj.next_cursor)
+            paths.append(path)
+        reached = min(len(path) for path in paths) + 1
+        if reached < depth:
+            self.stderr.write(
+                f'Лента короче {depth} страниц, замеряем страницу {reached}'
+            )
+        report = {}
+        for name, params in (
+            ('first_page', [{}] * len(clients)),
+            (f'page_{reached}', [
+                {'cursor': path[reached - 2]} if reached > 1 else {}
+                for path in paths
+            ]),
+        ):
+            def read():
+                for client, query in zip(clients, params):
+                    client.get(url, query)
+            read()
+            queries = count_queries(lambda: clients[0].get(url, params[0]))
+            timings = [
+                timing / len(clients) for timing in measure(read, repeat)
+            ]
+            report[name] = {**summarize(timings), 'queries': queries}
+        return report
+
+    def handle(self, *args, **options):
+        followers = options['followers']
+        scenarios = {
+            'read': {'POSTS_FOLLOW_FEED': 'read'},
+            'write': {
+                'POSTS_FOLLOW_FEED': 'write',
+                'POSTS_FOLLOW_FANOUT_LIMIT': followers * 2,
+            },
+            'hybrid': {
+                'POSTS_FOLLOW_FEED': 'write',
+                'POSTS_FOLLOW_FANOUT_LIMIT': followers,
+            },
+        }
+        report = {}
+        setup_test_environment()
+        try:
+            with benchmark_database(), override_settings(
+                PERF_METRICS_ENABLED=False, QUERY_LOG_ENABLED=False,
+                COMPRESSION_CACHE_PAGES=False,
+            ):
+                self.stderr.write('Создаём подписчиков и посты')
+                authors, readers = self.create_data(options)
+                for name, overrides in scenarios.items():
+                    self.stderr.write(f'Замеряем {name}')
+                    with override_settings(**overrides):
+                        InboxEntry.objects.all().delete()
+                        rebuild_inboxes(readers)
+                        get_cache().clear()
+                        report[name] = {
+                            'publish_ms': self.measure_publish(
+                                authors[0], options['repeat']
+                            ),
+                            'publish_heavy_ms': self.measure_publish(
+                                authors[-1], options['repeat']
+                            ),
+                            **self.measure_reads(
+                                readers, options['depth'], options['repeat']
+                            ),
+                            'inbox_rows': InboxEntry.objects.count(),
+                        }
+        finally:
+            teardown_test_environment()
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        for name, results in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for metric, result in results.items():
+                if isinstance(result, dict):
+                    extra = (
+                        f', {result["queries"]} запросов'
+                        if 'queries' in result else ''
+                    )
+                    result = (
+                        f'p50 {result["p50_ms"]} мс, '
+                        f'p95 {result["p95_ms"]} мс{extra}'
+                    )
+                self.stdout.write(f'  {metric}: {result}')
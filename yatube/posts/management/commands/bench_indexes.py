@@ -0,0 +1,113 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from core.benchmark import benchmark_database, measure, summarize
+from posts.counters import rebuild_counters
+from posts.models import Post
+from posts.seeding import seed_groups, seed_posts, seed_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет временную SQLite-базу постами и сравнивает планы '
+        'и время запросов лент без составных индексов и с ними'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--db-file', default=None,
+            help='Файл временной базы (по умолчанию — в памяти)',
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def get_queries(self, author_id, group_id, total):
+        per_page = settings.COUNT_POSTS
+        feed = Post.objects.for_feed()
+        # Страница 500, а в маленькой базе — последний пост.
+        deep = min(per_page * 500, total - 1)
+        pub_date, pk = Post.objects.values_list('pub_date', 'pk')[deep]
+        return {
+            'index': feed[:per_page],
+            'index deep page': feed[deep:deep + per_page],
+            # То же условие, что строит CursorPaginator
+            'index deep cursor': feed.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk),
+                pub_date__lte=pub_date,
+            )[:per_page],
+            'group_list': feed.filter(group_id=group_id)[:per_page],
+            'profile': feed.filter(author_id=author_id)[:per_page],
+        }
+
+    def explain(self, connection, query_set):
+        sql, params = query_set.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def run_queries(self, connection, queries, repeat):
+        report = {}
+        for name, query_set in queries.items():
+            report[name] = {
+                'plan': self.explain(connection, query_set),
+                'timing': summarize(measure(
+                    lambda: list(query_set.all()), repeat
+                )),
+            }
+        return report
+
+    def handle(self, *args, **options):
+        if options['posts'] < 1:
+            raise CommandError('Нужен хотя бы один пост: --posts 1')
+        with benchmark_database(name=options['db_file']) as connection:
+            if connection.vendor != 'sqlite':
+                self.stderr.write('Бенчмарк рассчитан на SQLite')
+                return
+            self.stderr.write(f'Наполняем базу: {options["posts"]} постов')
+            with transaction.atomic():
+                author_ids = seed_users(options['users'])
+                group_ids = seed_groups(options['groups'])
+                seed_posts(options['posts'], author_ids, group_ids)
+                rebuild_counters()
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            queries = self.get_queries(
+                author_ids[0], group_ids[0], options['posts']
+            )
+            indexes = Post._meta.indexes
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Post, index)
+            report = {'without_indexes': self.run_queries(
+                connection, queries, options['repeat']
+            )}
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(Post, index)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            report['with_indexes'] = self.run_queries(
+                connection, queries, options['repeat']
+            )
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        for phase, results in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(phase))
+            for name, result in results.items():
+                timing = result['timing']
+                self.stdout.write(
+                    f'  {name}: p50 {timing["p50_ms"]} мс, '
+                    f'p95 {timing["p95_ms"]} мс'
+                )
+                for step in result['plan']:
+                    self.stdout.write(f'      {step}')
@@ -0,0 +1,133 @@
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmark import benchmark_database, peak_memory, summarize
+from posts.cache import get_cache
+from posts.models import AuthorStat, Group, Post
+from posts.seeding import seed_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет основные страницы через тестовый клиент на нескольких '
+        'объёмах данных и выводит задержки, запросы и память в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,10000,100000',
+            help='Числа постов через запятую',
+        )
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--keep-cache', action='store_true',
+            help='Не очищать кэш перед каждым запросом',
+        )
+        parser.add_argument(
+            '--output', default='-', help='Файл отчёта, «-» — stdout'
+        )
+
+    def get_requests(self):
+        author = AuthorStat.objects.order_by('-posts_count').first().user
+        group = Group.objects.order_by('-posts_count').first()
+        post = Post.objects.filter(author=author).first()
+        guest = Client()
+        client = Client()
+        client.force_login(author)
+        edit_data = {'text': 'Правка из бенчмарка', 'group': group.pk}
+        return {
+            'index': lambda: guest.get(reverse('posts:index')),
+            'group_posts': lambda: guest.get(
+                reverse('posts:group_list', args=[group.slug])
+            ),
+            'profile': lambda: guest.get(
+                reverse('posts:profile', args=[author.username])
+            ),
+            'post_detail': lambda: guest.get(
+                reverse('posts:post_detail', args=[post.pk])
+            ),
+            'post_create': lambda: client.post(
+                reverse('posts:post_create'), {'text': 'Пост из бенчмарка'}
+            ),
+            'post_edit': lambda: client.post(
+                reverse('posts:post_edit', args=[post.pk]), edit_data
+            ),
+        }
+
+    def run_request(self, request, repeat, keep_cache):
+        cache = get_cache()
+        # Первый запрос прогревает импорты и загрузку шаблонов.
+        response = request()
+        timings = []
+        for _ in range(repeat):
+            if not keep_cache:
+                cache.clear()
+            started = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - started) * 1000)
+        if not keep_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        if not keep_cache:
+            cache.clear()
+        return {
+            'status': response.status_code,
+            **summarize(timings),
+            'queries': len(queries),
+            'peak_memory_kb': peak_memory(request),
+            'response_bytes': len(response.content),
+        }
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'repeat': options['repeat'],
+                'seed': options['seed'],
+                'keep_cache': options['keep_cache'],
+            },
+            'sizes': {},
+        }
+        setup_test_environment()
+        try:
+            for size in sizes:
+                self.stderr.write(f'Замеряем на {size} постах')
+                with benchmark_database():
+                    seed_data(
+                        min(options['users'], size), options['groups'],
+                        size, seed=options['seed'],
+                    )
+                    get_cache().clear()
+                    report['sizes'][str(size)] = {
+                        name: self.run_request(
+                            request, options['repeat'], options['keep_cache']
+                        )
+                        for name, request in self.get_requests().items()
+                    }
+        finally:
+            teardown_test_environment()
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(output + '\n')
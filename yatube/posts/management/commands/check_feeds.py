@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.feeds import check_feeds, rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет материализованные ленты с живыми запросами '
+        'и завершается с ошибкой при расхождениях'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Перестроить ленты с расхождениями',
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON'
+        )
+
+    def handle(self, *args, **options):
+        problems = check_feeds()
+        if options['json']:
+            self.stdout.write(json.dumps(problems, indent=2))
+        else:
+            for problem in problems:
+                self.stdout.write(
+                    f'{problem["feed"]}: '
+                    f'нет постов {problem["missing"]}, '
+                    f'лишние {problem["extra"]}, '
+                    f'устаревшие {problem["stale"]}'
+                )
+        if not problems:
+            self.stderr.write(self.style.SUCCESS('Ленты совпадают'))
+            return
+        if options['fix']:
+            with transaction.atomic():
+                # Ленту удалённой группы перестройка просто очистит.
+                rebuild_feeds([problem['feed'] for problem in problems])
+            self.stderr.write(self.style.SUCCESS(
+                f'Перестроено лент с расхождениями: {len(problems)}'
+            ))
+            return
+        raise CommandError(f'Расхождений в лентах: {len(problems)}')
@@ -0,0 +1,35 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, export_rows, guess_format, write_rows
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSON Lines или CSV, не загружая таблицу целиком'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки, «-» — stdout')
+        parser.add_argument('--format', choices=FORMATS, default=None)
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        rows = export_rows(options['chunk_size'])
+        started = time.perf_counter()
+        if path == '-':
+            count = write_rows(rows, sys.stdout, fmt)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                count = write_rows(rows, stream, fmt)
+        elapsed = time.perf_counter() - started
+        # Отчёт — в stderr, чтобы не смешивать его с выгрузкой в stdout.
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено постов: {count} за {elapsed:.2f} с '
+            f'({count / elapsed if elapsed else 0:.0f} в секунду)'
+        ))
@@ -0,0 +1,42 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, guess_format, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Загружает посты из JSON Lines или CSV пакетными вставками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами, «-» — stdin')
+        parser.add_argument('--format', choices=FORMATS, default=None)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов вставлять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        started = time.perf_counter()
+        if path == '-':
+            result = import_rows(
+                read_rows(sys.stdin, fmt), options['batch_size']
+            )
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                result = import_rows(
+                    read_rows(stream, fmt), options['batch_size']
+                )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {result.created} за {elapsed:.2f} с '
+            f'({result.created / elapsed if elapsed else 0:.0f} в секунду)'
+        ))
+        if result.skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Пропущено строк с неизвестным автором, группой '
+                f'или датой: {result.skipped}'
+            ))
@@ -0,0 +1,83 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import (
+    delete_thumbnails, make_thumbnails, missing_thumbnails
+)
+
+
+def make(name):
+    """Миниатюры одной картинки в процессе-исполнителе."""
+    try:
+        return name, make_thumbnails(name), None
+    except Exception as error:
+        return name, 0, f'{type(error).__name__}: {error}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее делает миниатюры картинок постов, распределяя '
+        'картинки по процессам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов; 1 — без пула, в этом процессе',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Переделать и уже готовые миниатюры',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Сколько картинок проверять одним запросом',
+        )
+
+    def pending(self, options):
+        names = (
+            Post.objects.exclude(image='').order_by('image')
+            .values_list('image', flat=True).distinct()
+        )
+        batch = []
+        for name in names.iterator():
+            batch.append(name)
+            if len(batch) == options['batch_size']:
+                yield from self.filter_batch(batch, options['force'])
+                batch = []
+        yield from self.filter_batch(batch, options['force'])
+
+    def filter_batch(self, names, force):
+        if not force:
+            return missing_thumbnails(names)
+        for name in names:
+            delete_thumbnails(name)
+        return names
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        names = list(self.pending(options))
+        if options['workers'] > 1 and len(names) > 1:
+            # Дочерние процессы не должны делить соединение родителя.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                options['workers'], initializer=django.setup
+            ) as executor:
+                results = list(executor.map(make, names, chunksize=4))
+        else:
+            results = [make(name) for name in names]
+        made = sum(count for _, count, _ in results)
+        for name, _, error in results:
+            if error:
+                self.stderr.write(f'{name}: {error}')
+        failed = sum(1 for _, _, error in results if error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок: {len(names)}, миниатюр: {made}, ошибок: {failed} '
+            f'за {time.perf_counter() - started:.2f} с'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.feeds import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает материализованные первые страницы главной '
+        'и лент групп'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            feeds, entries = rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Перестроено лент: {feeds}, записей: {entries}'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.following import rebuild_inboxes, trim_inboxes
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает заново входящие ленты подписок или, с --trim, '
+        'только обрезает переполненные'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trim', action='store_true',
+            help='Только обрезать входящие до POSTS_FOLLOW_INBOX_SIZE',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['trim']:
+                inboxes, entries = trim_inboxes()
+                message = f'Обрезано входящих: {inboxes}, удалено записей: '
+            else:
+                inboxes, entries = rebuild_inboxes()
+                message = f'Собрано входящих: {inboxes}, записей: '
+        self.stdout.write(self.style.SUCCESS(message + str(entries)))
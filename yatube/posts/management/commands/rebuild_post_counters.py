@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов авторов и групп'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк обновлять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        authors, groups = rebuild_counters(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлены счётчики: авторов — {authors}, групп — {groups}'
+        ))
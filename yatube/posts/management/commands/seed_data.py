@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.models import Group, User
+from posts.seeding import seed_data
+
+
+class Command(BaseCommand):
+    help = 'Наполняет базу синтетическими пользователями, группами и постами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed даёт одинаковые данные',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён пользователей и slug групп',
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if (
+            User.objects.filter(username__startswith=f'{prefix}_user')
+            .exists()
+            or Group.objects.filter(slug__startswith=f'{prefix}-group')
+            .exists()
+        ):
+            raise CommandError(
+                f'Данные с префиксом «{prefix}» уже есть в базе, '
+                f'укажите другой: --prefix {prefix}2'
+            )
+        started = time.perf_counter()
+        with transaction.atomic():
+            author_ids, group_ids = seed_data(
+                options['users'], options['groups'], options['posts'],
+                seed=options['seed'], prefix=options['prefix'],
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей — {len(author_ids)}, '
+            f'групп — {len(group_ids)}, постов — {options["posts"]} '
+            f'за {elapsed:.2f} с'
+        ))
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    AuthorStat = apps.get_model('posts', 'AuthorStat')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    db_alias = schema_editor.connection.alias
+    by_author = dict(
+        Post.objects.using(db_alias).order_by().values_list('author')
+        .annotate(count=models.Count('pk'))
+    )
+    AuthorStat.objects.using(db_alias).bulk_create(
+        AuthorStat(user_id=user_id, posts_count=by_author.get(user_id, 0))
+        for user_id in User.objects.using(db_alias).values_list('pk', flat=True).iterator()
+    )
+    by_group = (
+        Post.objects.using(db_alias).order_by().exclude(group=None).values_list('group')
+        .annotate(count=models.Count('pk'))
+    )
+    for group_id, count in by_group:
+        Group.objects.using(db_alias).filter(pk=group_id).update(posts_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_post_ordering_pk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStat',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_stat', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число постов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
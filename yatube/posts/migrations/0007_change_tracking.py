@@ -0,0 +1,34 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def fill_updated_at(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.using(schema_editor.connection.alias).update(updated_at=models.F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='authorstat',
+            name='posts_changed_at',
+            field=models.DateTimeField(db_index=True, null=True, verbose_name='Последнее изменение постов'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_changed_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Последнее изменение постов'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_feeds(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    FeedEntry = apps.get_model('posts', 'FeedEntry')
+    db_alias = schema_editor.connection.alias
+    if not settings.POSTS_FEED_PAGES:
+        return
+    size = settings.POSTS_FEED_PAGES * settings.COUNT_POSTS + 1
+    posts = Post.objects.using(db_alias).order_by('-pub_date', '-pk')
+    feeds = [('index', posts)] + [
+        (f'group:{pk}', posts.filter(group_id=pk))
+        for pk in Group.objects.using(db_alias).values_list('pk', flat=True)
+    ]
+    for feed, feed_posts in feeds:
+        FeedEntry.objects.using(db_alias).bulk_create(
+            FeedEntry(feed=feed, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in feed_posts.values_list('pk', 'pub_date')[:size]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=50)),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.Post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['feed', '-pub_date', '-post'], name='feed_entry_order_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='feedentry',
+            unique_together={('feed', 'post')},
+        ),
+        migrations.RunPython(build_feeds, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,31 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Колонки связанных таблиц, которые шаблоны лент никогда не читают
+FEED_DEFERRED_FIELDS = (
+    'author__password',
+    'author__last_login',
+    'author__is_superuser',
+    'author__is_staff',
+    'author__is_active',
+    'author__email',
+    'author__date_joined',
+    'group__description',
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент и страницы поста одним запросом.
+
+        Автор, его счётчик постов и группа подтягиваются JOIN-ом,
+        поэтому шаблоны не делают запросов на каждую строку.
+        """
+        return (
+            self.select_related('author__post_stat', 'group')
+            .defer(*FEED_DEFERRED_FIELDS)
+        )
+
 
 class Post(models.Model):
     group = models.ForeignKey(
@@ -24,18 +49,50 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
         verbose_name='Автор'
     )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        help_text='Картинка к посту'
+    )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        # Индексы повторяют сортировку лент, чтобы СУБД читала
+        # первые записи страницы прямо из индекса, без сортировки.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_feed_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx'
+            ),
+        ]
 
 
 class Group(models.Model):
@@ -46,6 +103,229 @@ class Group(models.Model):
         unique=True
     )
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        editable=False
+    )
+    posts_changed_at = models.DateTimeField(
+        'Последнее изменение постов',
+        null=True,
+        editable=False
+    )
 
     def __str__(self):
         return self.title
+
+
+class AuthorStat(models.Model):
+    """Денормализованные счётчики автора, обновляются сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stat',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0
+    )
+    posts_changed_at = models.DateTimeField(
+        'Последнее изменение постов',
+        null=True,
+        db_index=True
+    )
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+
+class SearchTerm(models.Model):
+    """Слово инвертированного индекса поиска и пост, где оно встречается."""
+    term = models.CharField(max_length=100)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post'], name='search_term_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class FeedEntry(models.Model):
+    """Пост из первых страниц материализованной ленты.
+
+    Лента — главная ('index') или группа ('group:<id>'); дата
+    публикации скопирована из поста, чтобы страница читалась
+    по индексу этой таблицы без сортировки posts_post.
+    """
+    feed = models.CharField(max_length=50)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('feed', 'post')
+        indexes = [
+            models.Index(
+                fields=['feed', '-pub_date', '-post'],
+                name='feed_entry_order_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.feed}: {self.post_id}'
+
+
+class Follow(models.Model):
+    """Подписка пользователя user на автора author."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='follow_not_self'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} → {self.author}'
+
+
+class InboxEntry(models.Model):
+    """Пост автора, на которого подписан user, во входящих user.
+
+    Входящие — первые POSTS_FOLLOW_INBOX_SIZE постов ленты подписок;
+    автор и дата публикации скопированы из поста, чтобы отписка
+    и чтение страницы обходились индексами этой таблицы.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='inbox_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='inbox_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='inbox_entry_order_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'], name='inbox_entry_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class Comment(models.Model):
+    """Комментарий к посту; ответы на комментарии образуют ветки.
+
+    path — id комментария и его предков через '/', дополненные нулями:
+    сортировка по нему выстраивает ветки в порядке обхода в глубину,
+    поэтому страница обсуждения — один запрос по ключу (keyset),
+    без рекурсии по parent.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Автор'
+    )
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    text = models.TextField(
+        'Текст комментария',
+        help_text='Введите текст комментария'
+    )
+    created = models.DateTimeField(
+        'Дата комментария',
+        auto_now_add=True
+    )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'path'], name='comment_thread_idx'
+            ),
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_latest_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+    @property
+    def depth(self):
+        return self.path.count('/')
+
+
+def get_posts_count(user):
+    """Число постов автора из счётчика, без запроса к posts_post."""
+    try:
+        return user.post_stat.posts_count
+    except AuthorStat.DoesNotExist:
+        return 0
@@ -1,8 +1,285 @@
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core import signing
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject, cached_property
 
+CURSOR_SALT = 'posts.pagination.cursor'
+NEXT = 'n'
+PREVIOUS = 'p'
 
-def get_paginator_page(request, query_set):
-    paginator = Paginator(query_set, settings.COUNT_POSTS)
+
+class CursorPage(Page):
+    """Страница, построенная по ключу последней показанной записи.
+
+    Номера страницы у неё нет: переход вперёд и назад выполняется
+    по подписанным курсорам `next_cursor` и `previous_cursor`.
+    Запрос к базе выполняется при первом обращении к записям или
+    курсорам, поэтому закэшированный шаблон страницу не загружает.
+    """
+    is_cursor = True
+    number = None
+
+    def __init__(self, paginator, fetch):
+        self.paginator = paginator
+        self._fetch = fetch
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    @cached_property
+    def _result(self):
+        return self._fetch()
+
+    @property
+    def object_list(self):
+        return self._result[0]
+
+    @property
+    def next_cursor(self):
+        return self._result[1]
+
+    @property
+    def previous_cursor(self):
+        return self._result[2]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор с навигацией по ключу сортировки (keyset pagination).
+
+    Кроме обычных номерных страниц умеет отдавать страницы по курсору:
+    запрос `WHERE (pub_date, id) < (...) LIMIT n` стоит одинаково
+    на любой глубине ленты и не требует `COUNT(*)`.
+    Если задан `count_limit`, общее число записей считается
+    не дальше этого предела (режим оценки количества).
+    `feed` — материализованная лента (posts.feeds.MaterializedFeed):
+    страницы, которые она покрывает, читаются через неё.
+    """
+
+    def __init__(
+        self, object_list, per_page, count_limit=None, feed=None, **kwargs
+    ):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_limit = count_limit
+        self.ordering = self._get_ordering()
+        if feed is not None and feed.ordering != self.ordering:
+            feed = None
+        self.feed = feed
+
+    def _get_ordering(self):
+        ordering = list(
+            self.object_list.query.order_by
+            or self.object_list.model._meta.ordering
+        )
+        pk_name = self.object_list.model._meta.pk.name
+        if not any(field.lstrip('-') in ('pk', pk_name) for field in ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-' + pk_name if descending else pk_name)
+        return [
+            field.replace('pk', pk_name) if field.lstrip('-') == 'pk'
+            else field
+            for field in ordering
+        ]
+
+    @cached_property
+    def estimated_count(self):
+        """Число записей, посчитанное не дальше `count_limit`."""
+        if self.count_limit is None:
+            return self.count
+        if 'count' in self.__dict__:
+            # Точное число уже посчитано — второй запрос не нужен.
+            return min(self.count, self.count_limit + 1)
+        rows = self.object_list.order_by().values('pk')
+        return rows[:self.count_limit + 1].count()
+
+    @property
+    def count_is_estimated(self):
+        return (
+            self.count_limit is not None
+            and self.estimated_count > self.count_limit
+        )
+
+    def _key(self, obj):
+        return [
+            getattr(obj, field.lstrip('-')) for field in self.ordering
+        ]
+
+    def _make_cursor(self, obj, direction):
+        key = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in self._key(obj)
+        ]
+        return signing.dumps(
+            {'d': direction, 'k': key}, salt=CURSOR_SALT, compress=True
+        )
+
+    def _parse_cursor(self, cursor):
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        model = self.object_list.model
+        fields = [field.lstrip('-') for field in self.ordering]
+        if data.get('d') not in (NEXT, PREVIOUS):
+            raise signing.BadSignature('Unknown cursor direction')
+        if len(data.get('k', ())) != len(fields):
+            raise signing.BadSignature('Cursor does not match ordering')
+        key = [
+            model._meta.get_field(field).to_python(value)
+            for field, value in zip(fields, data['k'])
+        ]
+        return data['d'], key
+
+    def _after(self, key, reverse=False):
+        """Условие «запись идёт после key» в порядке сортировки.
+
+        Нестрогая граница по первому полю дублирует условие, но без неё
+        SQLite не сводит OR к диапазону по индексу ленты.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, key):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = '__lt' if descending else '__gt'
+            condition |= Q(**equal, **{name + lookup: value})
+            equal[name] = value
+        first = self.ordering[0]
+        lookup = '__lte' if first.startswith('-') != reverse else '__gte'
+        return Q(**{first.lstrip('-') + lookup: key[0]}) & condition
+
+    def page(self, number):
+        if self.feed is None or self.orphans:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = min(bottom + self.per_page, self.count)
+        # Как и срез QuerySet, список читается при первом обращении.
+        return self._get_page(
+            SimpleLazyObject(lambda: self._feed_slice(bottom, top)),
+            number,
+            self,
+        )
+
+    def _feed_slice(self, bottom, top):
+        rows = self.feed.rows(
+            self.object_list, offset=bottom, limit=top - bottom,
+            count=self.count,
+        )
+        if rows is None:
+            rows = list(self.object_list[bottom:top])
+        return rows
+
+    def cursor_page(self, cursor=None):
+        """Возвращает страницу, следующую за курсором (или первую)."""
+        if cursor is None:
+            return CursorPage(self, self._fetch_forward)
+        direction, key = self._parse_cursor(cursor)
+        if direction == NEXT:
+            return CursorPage(self, lambda: self._fetch_forward(key))
+        return CursorPage(self, lambda: self._fetch_backward(key))
+
+    def get_cursor_page(self, cursor=None):
+        """Как cursor_page(), но при битом курсоре отдаёт первую страницу."""
+        try:
+            return self.cursor_page(cursor)
+        except (signing.BadSignature, ValueError, TypeError):
+            return self.cursor_page()
+
+    def _fetch_forward(self, key=None):
+        """Страница после key, без key — первая."""
+        limit = self.per_page + 1
+        rows = None
+        if self.feed is not None:
+            rows = self.feed.rows(
+                self.object_list, key, limit=limit,
+                count=self.__dict__.get('count'),
+            )
+        if rows is None:
+            query_set = self.object_list
+            if key is not None:
+                query_set = query_set.filter(self._after(key))
+            rows = list(query_set.order_by(*self.ordering)[:limit])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        next_cursor = self._make_cursor(rows[-1], NEXT) if has_next else None
+        previous_cursor = (
+            None if key is None or not rows
+            else self._make_cursor(rows[0], PREVIOUS)
+        )
+        return rows, next_cursor, previous_cursor
+
+    def _fetch_backward(self, key):
+        reverse_ordering = [
+            field.lstrip('-') if field.startswith('-') else '-' + field
+            for field in self.ordering
+        ]
+        rows = list(
+            self.object_list.filter(self._after(key, reverse=True))
+            .order_by(*reverse_ordering)[:self.per_page + 1]
+        )
+        if len(rows) <= self.per_page:
+            # Дошли до начала ленты: показываем обычную первую страницу.
+            return self._fetch_forward()
+        rows = rows[:self.per_page][::-1]
+        return (
+            rows,
+            self._make_cursor(rows[-1], NEXT),
+            self._make_cursor(rows[0], PREVIOUS),
+        )
+
+    def page_number_of(self, obj):
+        """Номер страницы, на которой стоит obj при нумерации с начала."""
+        before = self.object_list.filter(
+            self._after(self._key(obj), reverse=True)
+        )
+        return before.order_by().count() // self.per_page + 1
+
+
+def page_window(paginator, number, on_each_side=None, on_ends=1):
+    """Номера страниц для навигации: края и окно вокруг текущей.
+
+    Пропуски обозначаются None, поэтому число ссылок не зависит
+    от числа страниц: 1 … 48 49 [50] 51 52 … 1000.
+    """
+    if on_each_side is None:
+        on_each_side = settings.PAGINATION_WINDOW
+    num_pages = paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    window = []
+    if number > 1 + on_each_side + on_ends + 1:
+        window += list(range(1, on_ends + 1)) + [None]
+        start = number - on_each_side
+    else:
+        start = 1
+    if number < num_pages - on_each_side - on_ends - 1:
+        window += list(range(start, number + on_each_side + 1)) + [None]
+        window += list(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        window += list(range(start, num_pages + 1))
+    return window
+
+
+def get_paginator_page(request, query_set, count=None, feed=None):
+    """Страница ленты по параметрам запроса.
+
+    `count` — заранее известное число записей (например, из счётчика),
+    с ним пагинатор обходится без `COUNT(*)`; `feed` — материализованная
+    лента для первых страниц.
+    """
+    paginator = CursorPaginator(
+        query_set,
+        settings.COUNT_POSTS,
+        count_limit=settings.PAGINATION_COUNT_LIMIT,
+        feed=feed,
+    )
+    if count is not None:
+        paginator.count = count
     page_number = request.GET.get('page')
+    if settings.PAGINATION_CURSOR and page_number is None:
+        return paginator.get_cursor_page(request.GET.get('cursor'))
     return paginator.get_page(page_number)
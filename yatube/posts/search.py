@@ -0,0 +1,223 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite используется виртуальная таблица FTS5, на остальных СУБД —
+собственный инвертированный индекс в таблице SearchTerm. Оба индекса
+обновляются сигналами при сохранении и удалении поста. Найденные посты
+ранжируются по релевантности с поправкой на свежесть.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from .models import Post, SearchTerm
+
+FTS_TABLE = 'posts_post_fts'
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return [word.lower() for word in WORD_RE.findall(text)]
+
+
+class FTS5Backend:
+    """Поиск через SQLite FTS5, релевантность — bm25."""
+
+    def index_posts(self, posts):
+        rows = [(post.pk, post.text) for post in posts]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk, _ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                rows,
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def match_query(self, words):
+        # Каждое слово в кавычках — пользовательский ввод не ломает
+        # синтаксис MATCH; звёздочка ищет и по началу слова.
+        return ' '.join('"{}"*'.format(word) for word in words)
+
+    def match(self, words, limit):
+        query = self.match_query(words)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s',
+                [query, limit],
+            )
+            return dict(cursor.fetchall())
+
+    def filter(self, query_set, words):
+        # Не RawSQL: в pk__in он даёт IN ((SELECT ...)), и SQLite
+        # считает подзапрос скалярным — находится один пост.
+        pk = '{}.{}'.format(
+            connection.ops.quote_name(query_set.model._meta.db_table),
+            connection.ops.quote_name(query_set.model._meta.pk.column),
+        )
+        return query_set.extra(
+            where=[
+                f'{pk} IN (SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[self.match_query(words)],
+        )
+
+
+class InvertedIndexBackend:
+    """Инвертированный индекс в обычной таблице, релевантность — TF-IDF."""
+
+    def index_posts(self, posts):
+        posts = list(posts)
+        SearchTerm.objects.filter(post__in=posts).delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(post=post, term=term[:100], frequency=frequency)
+            for post in posts
+            for term, frequency in Counter(tokenize(post.text)).items()
+        )
+
+    def remove_post(self, post_id):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchTerm.objects.all().delete()
+
+    def match(self, words, limit):
+        total = Post.objects.count() or 1
+        scores = None
+        for word in words:
+            postings = SearchTerm.objects.filter(
+                term__startswith=word
+            ).values_list('post_id', 'frequency')
+            word_scores = defaultdict(float)
+            for post_id, frequency in postings:
+                word_scores[post_id] += frequency
+            if not word_scores:
+                return {}
+            idf = math.log(1 + total / len(word_scores))
+            if scores is None:
+                scores = {pk: tf * idf for pk, tf in word_scores.items()}
+            else:
+                scores = {
+                    pk: score + word_scores[pk] * idf
+                    for pk, score in scores.items() if pk in word_scores
+                }
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        return dict(ranked[:limit])
+
+    def filter(self, query_set, words):
+        for word in words:
+            query_set = query_set.filter(pk__in=SearchTerm.objects.filter(
+                term__startswith=word
+            ).values('post_id'))
+        return query_set
+
+
+def fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    return _has_fts_table(connection.settings_dict['NAME'])
+
+
+@lru_cache(maxsize=None)
+def _has_fts_table(database_name):
+    # Таблицу создаёт миграция, поэтому проверяем один раз на базу.
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def get_backend():
+    name = settings.POSTS_SEARCH_BACKEND
+    if name == 'auto':
+        name = 'fts5' if fts5_available() else 'inverted'
+    return FTS5Backend() if name == 'fts5' else InvertedIndexBackend()
+
+
+def index_posts(posts):
+    get_backend().index_posts(posts)
+
+
+def remove_post(post_id):
+    get_backend().remove_post(post_id)
+
+
+def reindex(batch_size=1000):
+    """Строит индекс заново, читая посты пачками; возвращает их число."""
+    get_backend().clear()
+    return index_batches(Post.objects.all(), batch_size)
+
+
+def index_batches(posts, batch_size=1000):
+    """Индексирует посты query_set пачками; возвращает их число."""
+    backend = get_backend()
+    posts = posts.only('text').order_by('pk').iterator(batch_size)
+    batch = []
+    total = 0
+    for post in posts:
+        batch.append(post)
+        if len(batch) == batch_size:
+            backend.index_posts(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        backend.index_posts(batch)
+        total += len(batch)
+    return total
+
+
+def rank(scores):
+    """Упорядочивает id постов по релевантности и свежести."""
+    if not scores:
+        return []
+    best = max(scores.values()) or 1
+    now = timezone.now()
+    half_life = settings.POSTS_SEARCH_RECENCY_HALF_LIFE_DAYS
+    weight = settings.POSTS_SEARCH_RECENCY_WEIGHT
+    dates = Post.objects.filter(pk__in=scores).values_list('pk', 'pub_date')
+    ranked = []
+    for pk, pub_date in dates:
+        age_days = (now - pub_date).total_seconds() / 86400
+        recency = 0.5 ** (max(age_days, 0) / half_life)
+        ranked.append((scores[pk] / best + weight * recency, pk))
+    ranked.sort(reverse=True)
+    return [pk for _, pk in ranked]
+
+
+def search_post_ids(query, limit=None):
+    """id найденных постов от самых подходящих к менее подходящим."""
+    words = tokenize(query)
+    if not words:
+        return []
+    limit = limit or settings.POSTS_SEARCH_MAX_RESULTS
+    try:
+        scores = get_backend().match(words, limit)
+    except DatabaseError:
+        return []
+    return rank(scores)
+
+
+def filter_posts(query_set, query):
+    """Все посты query_set, подходящие под запрос, без ранжирования.
+
+    В отличие от search_post_ids, не ограничено
+    POSTS_SEARCH_MAX_RESULTS: условие уходит в базу подзапросом.
+    """
+    words = tokenize(query)
+    if not words:
+        return query_set.none()
+    return get_backend().filter(query_set, words)
@@ -0,0 +1,131 @@
+"""Быстрое наполнение базы синтетическими данными для бенчмарков."""
+import random
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+from faker import Faker
+
+from .models import Group, Post, User
+from .transfer import refresh_derived
+
+WORDS = (
+    'пост', 'лента', 'группа', 'автор', 'новость', 'день', 'город',
+    'фото', 'кот', 'код', 'чай', 'утро', 'вечер', 'поход', 'книга',
+    'музыка', 'сад', 'море', 'снег', 'дорога',
+)
+
+
+def random_text(rnd, words=12):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed_users(count, prefix='user', batch_size=None, fake=None):
+    """Создаёт пользователей без пароля одним пакетом вставок.
+
+    С `fake` (экземпляр Faker) пользователи получают имена и фамилии.
+    """
+    User.objects.bulk_create(
+        (
+            User(
+                username=f'{prefix}{number}',
+                password='!',
+                first_name=fake.first_name() if fake else '',
+                last_name=fake.last_name() if fake else '',
+            )
+            for number in range(count)
+        ),
+        batch_size=batch_size,
+    )
+    return list(
+        User.objects.filter(username__startswith=prefix)
+        .values_list('pk', flat=True)
+    )
+
+
+def seed_groups(count, prefix='group', batch_size=None, fake=None):
+    Group.objects.bulk_create(
+        (
+            Group(
+                title=(
+                    fake.sentence(nb_words=3).rstrip('.') if fake
+                    else f'Группа {number}'
+                )[:200],
+                slug=f'{prefix}-{number}',
+                description=fake.paragraph() if fake else 'Описание группы',
+            )
+            for number in range(count)
+        ),
+        batch_size=batch_size,
+    )
+    return list(
+        Group.objects.filter(slug__startswith=prefix)
+        .values_list('pk', flat=True)
+    )
+
+
+def seed_posts(count, author_ids, group_ids, seed=0, batch_size=5000,
+               span=timedelta(days=365), texts=None):
+    """Вставляет count постов пакетами через executemany.
+
+    `bulk_create` не годится: auto_now_add затирает pub_date, а даты
+    нужны разбросанные по времени, как в живой ленте.
+    `texts` — готовые тексты, из которых случайно выбираются посты.
+    Счётчики и прочие данные, которые ведут сигналы, не обновляются.
+    """
+    rnd = random.Random(seed)
+    now = timezone.now()
+    fields = [Post._meta.get_field(name) for name in (
+        'text', 'pub_date', 'updated_at', 'author', 'group', 'image',
+        'comments_count',
+    )]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(Post._meta.db_table),
+        ', '.join(connection.ops.quote_name(f.column) for f in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    span_seconds = span.total_seconds()
+    with connection.cursor() as cursor:
+        for start in range(0, count, batch_size):
+            rows = []
+            for _ in range(min(batch_size, count - start)):
+                pub_date = connection.ops.adapt_datetimefield_value(
+                    now - timedelta(seconds=rnd.random() * span_seconds)
+                )
+                rows.append((
+                    rnd.choice(texts) if texts else random_text(rnd),
+                    pub_date,
+                    pub_date,
+                    rnd.choice(author_ids),
+                    (
+                        rnd.choice(group_ids)
+                        if group_ids and rnd.random() < 0.7 else None
+                    ),
+                    '',
+                    0,
+                ))
+            cursor.executemany(sql, rows)
+
+
+def seed_data(users, groups, posts, seed=0, prefix='seed', locale='ru_RU'):
+    """Правдоподобные данные Faker с фиксированным seed.
+
+    Тексты постов выбираются из заранее созданного набора: Faker
+    на каждый пост заметно замедлил бы наполнение миллионом записей.
+    После вставки обновляются счётчики, поисковый индекс и кэш лент.
+    """
+    fake = Faker(locale)
+    fake.seed_instance(seed)
+    author_ids = seed_users(users, f'{prefix}_user', fake=fake)
+    group_ids = seed_groups(groups, f'{prefix}-group', fake=fake)
+    texts = [
+        fake.text(max_nb_chars=length)
+        for length in random.Random(seed).choices(
+            (80, 200, 600), k=min(posts, 2000)
+        )
+    ]
+    seed_posts(posts, author_ids, group_ids, seed=seed, texts=texts)
+    refresh_derived(
+        author_ids, group_ids, Post.objects.filter(author_id__in=author_ids)
+    )
+    return author_ids, group_ids
@@ -0,0 +1,176 @@
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from .cache import (
+    get_cache, group_feed, invalidate_authors, invalidate_post, lookup_key
+)
+from .comments import comments_changed, set_path
+from .counters import (
+    change_author_count, change_followers_count, change_group_count,
+    touch_posts,
+)
+from .feeds import (
+    add_to_feeds, drop_feed, move_between_feeds, remove_from_feeds
+)
+from .following import follow_added, follow_removed, push_post
+from .models import (
+    AuthorStat, Comment, Follow, Group, InboxEntry, Post, User
+)
+from .search import index_posts, remove_post
+from .thumbnails import delete_image
+
+
+def remember_counted(post):
+    post._counted_author_id = post.__dict__.get('author_id')
+    post._counted_group_id = post.__dict__.get('group_id')
+    image = post.__dict__.get('image')
+    post._saved_image = getattr(image, 'name', image)
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    remember_counted(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+        add_to_feeds(instance)
+        push_post(instance)
+    else:
+        if instance.author_id != instance._counted_author_id:
+            change_author_count(instance._counted_author_id, -1)
+            change_author_count(instance.author_id, 1)
+            # Подписчикам прежнего автора пост больше не нужен.
+            InboxEntry.objects.filter(post=instance).delete()
+        else:
+            change_author_count(instance.author_id, 0)
+        if instance.group_id != instance._counted_group_id:
+            change_group_count(instance._counted_group_id, -1)
+            change_group_count(instance.group_id, 1)
+            move_between_feeds(instance, instance._counted_group_id)
+        else:
+            change_group_count(instance.group_id, 0)
+    invalidate_post(
+        instance,
+        created=created,
+        old_author_id=instance._counted_author_id,
+        old_group_id=instance._counted_group_id,
+    )
+    if instance._saved_image and instance._saved_image != instance.image.name:
+        # Картинку заменили или убрали — прежняя больше не нужна.
+        delete_image(instance._saved_image)
+    remember_counted(instance)
+    if update_fields is None or 'text' in update_fields:
+        index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_author_count(instance.author_id, -1)
+    change_group_count(instance.group_id, -1)
+    invalidate_post(instance, deleted=True)
+    remove_post(instance.pk)
+    remove_from_feeds(instance)
+    if instance.image:
+        delete_image(instance.image.name)
+
+
+def authors_changed(author_ids, group_ids=()):
+    touch_posts(author_ids, group_ids)
+    invalidate_authors(author_ids, group_ids)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # SET_NULL у постов сигналов не шлёт, а ссылки на группу стоят
+    # в постах на главной и в профилях авторов.
+    authors_changed(set(
+        Post.objects.filter(group=instance).order_by()
+        .values_list('author_id', flat=True).distinct()
+    ))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    drop_feed(group_feed(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        set_path(instance)
+    comments_changed(instance.post_id, 1 if created else 0)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    comments_changed(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_followers_count(instance.author_id, 1)
+        follow_added(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    followers_count = change_followers_count(instance.author_id, -1)
+    follow_removed(instance, followers_count)
+
+
+def remember_name(user):
+    user._saved_name = (
+        user.__dict__.get('first_name'), user.__dict__.get('last_name')
+    )
+
+
+@receiver(post_init, sender=User)
+def user_loaded(sender, instance, **kwargs):
+    remember_name(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        AuthorStat.objects.get_or_create(user=instance)
+    elif instance._saved_name != (
+        instance.__dict__.get('first_name'),
+        instance.__dict__.get('last_name'),
+    ):
+        # Имя автора стоит в каждом его посте в лентах.
+        authors_changed({instance.pk}, set(
+            Post.objects.filter(author=instance).exclude(group=None)
+            .order_by().values_list('group_id', flat=True).distinct()
+        ))
+    remember_name(instance)
+
+
+@receiver(post_init, sender=Group)
+@receiver(post_init, sender=User)
+def lookup_loaded(sender, instance, **kwargs):
+    field = 'slug' if sender is Group else 'username'
+    instance._cached_lookup = instance.__dict__.get(field)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def lookup_changed(sender, instance, **kwargs):
+    kind, field = (
+        ('group', 'slug') if sender is Group else ('profile', 'username')
+    )
+    values = {instance._cached_lookup, getattr(instance, field)} - {None}
+    get_cache().delete_many([lookup_key(kind, value) for value in values])
+    instance._cached_lookup = getattr(instance, field)
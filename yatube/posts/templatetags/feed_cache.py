@@ -0,0 +1,36 @@
+from django import template
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, page_cache):
+        self.nodelist = nodelist
+        self.page_cache = page_cache
+
+    def render(self, context):
+        page_cache = self.page_cache.resolve(context)
+        if page_cache is None:
+            return self.nodelist.render(context)
+        html = page_cache.get()
+        if html is None:
+            html = self.nodelist.render(context)
+            page_cache.set(html)
+        return html
+
+
+@register.tag
+def feedcache(parser, token):
+    """Кэширует фрагмент страницы ленты.
+
+    Использование: {% feedcache feed_cache %}...{% endfeedcache %},
+    где feed_cache — объект FeedPageCache из контекста или None.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает один аргумент — кэш страницы"
+        )
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    return FeedCacheNode(nodelist, parser.compile_filter(bits[1]))
@@ -0,0 +1,11 @@
+from django import template
+
+from ..pagination import page_window as get_page_window
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj):
+    """{% page_window page_obj as pages %} — номера страниц с пропусками."""
+    return get_page_window(page_obj.paginator, page_obj.number)
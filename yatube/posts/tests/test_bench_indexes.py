@@ -0,0 +1,22 @@
+import json
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TransactionTestCase
+
+
+class BenchIndexesCommandTest(TransactionTestCase):
+    def test_small_database(self):
+        """На базе меньше 500 страниц бенчмарк берёт последний пост"""
+        out = StringIO()
+        call_command(
+            'bench_indexes', posts=30, users=3, groups=2, repeat=1,
+            json=True, stdout=out, stderr=StringIO(),
+        )
+        report = json.loads(out.getvalue())
+        self.assertIn('index deep page', report['with_indexes'])
+
+    def test_no_posts(self):
+        """Без постов бенчмарк отказывается запускаться"""
+        with self.assertRaises(CommandError):
+            call_command('bench_indexes', posts=0, stderr=StringIO())
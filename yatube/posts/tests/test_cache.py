@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import FeedPageCache, group_feed, lookup_key, stats
+from ..counters import rebuild_counters
+from ..feeds import rebuild_feeds
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class IndexCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='SomeUser')
+        cls.post = Post.objects.create(author=cls.user, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_page_skips_queries(self):
+        """Повторный запрос главной берёт ленту из кэша"""
+        self.client.get(reverse('posts:index'))
+        # Остаётся только проверка ETag / Last-Modified
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Первый пост')
+        self.assertEqual(
+            stats()['index'], {'hits': 1, 'misses': 1, 'stale': 0}
+        )
+
+    def test_new_post_invalidates_index(self):
+        """Новый пост сразу появляется на закэшированной главной"""
+        self.client.get(reverse('posts:index'))
+        Post.objects.create(author=self.user, text='Второй пост')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Второй пост')
+
+    def test_edit_invalidates_only_its_page(self):
+        """Правка поста сбрасывает только страницу, где он стоит"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Новый пост') for _ in range(10)
+        )
+        rebuild_feeds()
+        cache.clear()
+        second_page = reverse('posts:index') + '?page=2'
+        self.client.get(reverse('posts:index'))
+        self.client.get(second_page)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:index'))
+        response = self.client.get(second_page)
+        self.assertContains(response, 'Исправленный пост')
+
+
+class GroupProfileCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='SomeUser')
+        cls.group = Group.objects.create(
+            title='Первая группа', slug='first', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Вторая группа', slug='second', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def get_urls(self):
+        return (
+            reverse('posts:group_list', kwargs={'slug': 'first'}),
+            reverse('posts:profile', kwargs={'username': 'SomeUser'}),
+        )
+
+    def test_cached_pages_skip_queries(self):
+        """Группа и профиль из кэша не читают ленту из базы"""
+        for url in self.get_urls():
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(1):
+                    response = self.client.get(url)
+                self.assertContains(response, 'Пост группы')
+
+    def test_moving_post_invalidates_both_groups(self):
+        """Перенос поста в другую группу обновляет обе страницы групп"""
+        first = reverse('posts:group_list', kwargs={'slug': 'first'})
+        second = reverse('posts:group_list', kwargs={'slug': 'second'})
+        self.client.get(first)
+        self.client.get(second)
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Пост группы', 'group': self.other_group.pk},
+        )
+        self.assertNotContains(self.client.get(first), 'Пост группы')
+        response = self.client.get(second)
+        self.assertContains(response, 'Пост группы')
+        self.assertEqual(response.context['group'].posts_count, 1)
+
+    def test_lookup_keys_are_safe(self):
+        """Ключи объектов годятся для memcached при любом username"""
+        key = lookup_key('profile', 'Пользователь с пробелом@+.-')
+        self.assertTrue(key.isascii())
+        self.assertNotIn(' ', key)
+
+    def test_cached_profile_has_no_password(self):
+        """В кэш профиля не попадает хеш пароля"""
+        self.client.get(self.get_urls()[1])
+        author = cache.get(lookup_key('profile', 'SomeUser'))
+        self.assertEqual(author.pk, self.user.pk)
+        self.assertNotIn('password', author.__dict__)
+        self.assertEqual(author.post_stat.posts_count, 1)
+
+    @override_settings(POSTS_CACHE_STALE_WHILE_REVALIDATE=True)
+    def test_stale_page_served_while_revalidating(self):
+        """Пока страницу перерисовывает другой запрос, отдаётся старая"""
+        url = reverse('posts:group_list', kwargs={'slug': 'first'})
+        self.client.get(url)
+        Post.objects.create(
+            author=self.user, group=self.group, text='Новый пост'
+        )
+        page_cache = FeedPageCache(
+            'group', group_feed(self.group.pk), '1', 'c'
+        )
+        cache.add(page_cache.lock_key, 1)
+        self.assertNotContains(self.client.get(url), 'Новый пост')
+        self.assertEqual(stats()['group']['stale'], 1)
+        cache.delete(page_cache.lock_key)
+        self.assertContains(self.client.get(url), 'Новый пост')
+
+
+class PaginationModeCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='SomeUser')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(settings.COUNT_POSTS + 1)
+        )
+        rebuild_counters()
+        rebuild_feeds()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'SomeUser'}),
+        )
+
+    def assertNavigation(self, url, query, link):
+        response = self.client.get(url, query)
+        self.assertContains(response, link)
+
+    def test_cursor_and_numbered_pages_are_cached_apart(self):
+        """Первая страница по курсору и ?page=1 не отдают чужую навигацию"""
+        for url in self.get_urls():
+            for first, second in (('cursor', 'page'), ('page', 'cursor')):
+                with self.subTest(url=url, first=first):
+                    cache.clear()
+                    for mode in (first, second):
+                        if mode == 'cursor':
+                            self.assertNavigation(url, {}, '?cursor=')
+                        else:
+                            self.assertNavigation(
+                                url, {'page': 1}, 'page=2'
+                            )
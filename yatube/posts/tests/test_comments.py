@@ -0,0 +1,160 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=3, COMMENTS_MAX_DEPTH=3)
+class CommentTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Commenter')
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def comment(self, text, parent=None, post=None):
+        return Comment.objects.create(
+            post=post or self.post, author=self.user, text=text,
+            parent=parent,
+        )
+
+    def post_count(self, post=None):
+        return Post.objects.get(pk=(post or self.post).pk).comments_count
+
+    def thread(self):
+        """Все страницы обсуждения, пройденные по курсорам."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        texts = []
+        query = {}
+        while True:
+            comments = self.client.get(url, query).context['comments']
+            texts += [comment.text for comment in comments]
+            if not comments.has_next():
+                return texts
+            query = {'cursor': comments.next_cursor}
+
+    def test_add_comment(self):
+        """Комментарий добавляет только вошедший пользователь"""
+        url = reverse('posts:add_comment', args=[self.post.pk])
+        response = self.client.post(url, {'text': 'Первый'})
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk])
+        )
+        Client().post(url, {'text': 'Гость'})
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Первый']
+        )
+        self.assertEqual(self.post_count(), 1)
+
+    def test_replies_to_other_posts_are_rejected(self):
+        """Ответить можно только на комментарий того же поста"""
+        other = Post.objects.create(author=self.author, text='Другой')
+        foreign = self.comment('Чужой', post=other)
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Ответ', 'parent': foreign.pk},
+        )
+        self.assertEqual(self.post_count(), 0)
+
+    def test_thread_order_and_depth(self):
+        """Ветки идут в порядке обхода, глубже предела ответы не вложены"""
+        first = self.comment('1')
+        second = self.comment('2')
+        reply = self.comment('1.1', parent=first)
+        self.comment('2.1', parent=second)
+        url = reverse('posts:add_comment', args=[self.post.pk])
+        self.client.post(url, {'text': '1.1.1', 'parent': reply.pk})
+        deep = Comment.objects.get(text='1.1.1')
+        self.client.post(url, {'text': '1.1.2', 'parent': deep.pk})
+        self.assertEqual(
+            Comment.objects.get(text='1.1.2').parent_id, reply.pk
+        )
+        self.assertEqual(deep.depth, 2)
+        self.assertEqual(
+            self.thread(), ['1', '1.1', '1.1.1', '1.1.2', '2', '2.1']
+        )
+
+    def test_delete_updates_count(self):
+        """Удаление комментария с ответами уменьшает счётчик"""
+        first = self.comment('1')
+        self.comment('1.1', parent=first)
+        self.comment('2')
+        first.delete()
+        self.assertEqual(self.post_count(), 1)
+
+    def test_detail_queries_do_not_grow(self):
+        """Страница поста читает обсуждение одним запросом"""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.comment('1')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        parent = None
+        for number in range(10):
+            parent = self.comment(f'Ответ {number}', parent=parent)
+        cache.clear()
+        with self.assertNumQueries(len(few)):
+            self.client.get(url)
+
+    def test_detail_changes_after_comment(self):
+        """Новый комментарий меняет ETag страницы поста"""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        self.comment('Новый')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый')
+
+
+class CommentPreviewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Commenter')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(6)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def comment_posts(self, posts):
+        for post in posts:
+            for number in range(3):
+                Comment.objects.create(
+                    post=post, author=self.user, text=f'Комментарий {number}'
+                )
+
+    def index_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        return response, len(queries)
+
+    def test_previews_in_one_query(self):
+        """Превью всех постов страницы читаются одним запросом"""
+        self.comment_posts(self.posts[:1])
+        _, one = self.index_queries()
+        self.comment_posts(self.posts[1:])
+        response, many = self.index_queries()
+        self.assertEqual(many, one)
+        row = next(
+            row for row in response.context['rows']
+            if row.post.pk == self.posts[0].pk
+        )
+        self.assertEqual(row.post.comments_count, 3)
+        self.assertEqual(
+            [comment.text for comment in row.comments],
+            ['Комментарий 1', 'Комментарий 2'],
+        )
+        self.assertContains(response, 'Комментариев: 3', count=6)
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='SomeUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+
+    def get_urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'SomeUser'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Неизменённая страница отвечает 304 без отрисовки шаблона"""
+        for url in self.get_urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(1):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_edit_changes_validators(self):
+        """Правка поста меняет ETag всех страниц, где он виден"""
+        etags = {url: self.client.get(url)['ETag'] for url in self.get_urls()}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Исправленный пост')
+
+    def test_group_delete_changes_validators(self):
+        """Удаление группы меняет ETag и кэш главной и профиля автора"""
+        urls = self.get_urls()[0], self.get_urls()[2]
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Group.objects.get(pk=self.group.pk).delete()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotContains(response, '/group/test-slug/')
+
+    def test_author_name_changes_validators(self):
+        """Новое имя автора меняет ETag и кэш его лент"""
+        cache.clear()
+        etags = {url: self.client.get(url)['ETag'] for url in self.get_urls()}
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name, user.last_name = 'Лев', 'Толстой'
+        user.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Лев Толстой')
+
+    def test_etag_depends_on_user(self):
+        """Страница авторизованного пользователя не совпадает с гостевой"""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_missing_group_is_not_found(self):
+        """Для несуществующей группы проверка не мешает ответу 404"""
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
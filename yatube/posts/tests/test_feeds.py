@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..feeds import INDEX_FEED, check_feeds, entries
+from ..models import FeedEntry, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_FEED_PAGES=1, COUNT_POSTS=3)
+class FeedEntryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeUser')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                author=self.user,
+                group=self.group if number % 2 else None,
+                text=f'Пост {number}',
+            )
+            for number in range(8)
+        ]
+
+    def feed_ids(self, feed):
+        return list(entries(feed).values_list('post', flat=True))
+
+    def page_ids(self, url):
+        response = self.client.get(url)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_signals_keep_feeds_in_sync(self):
+        """Создание, смена группы и удаление поста обновляют ленты"""
+        newest = [post.pk for post in reversed(self.posts)]
+        # Одна страница из трёх постов и запись-признак следующей.
+        self.assertEqual(self.feed_ids(INDEX_FEED), newest[:4])
+        post = self.posts[-1]
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(check_feeds(), [])
+        self.assertEqual(self.feed_ids(f'group:{self.other_group.pk}'), [
+            post.pk
+        ])
+        self.posts[-2].delete()
+        self.assertEqual(check_feeds(), [])
+        self.assertEqual(
+            self.feed_ids(INDEX_FEED), [newest[0]] + newest[2:5]
+        )
+        self.other_group.delete()
+        self.assertEqual(check_feeds(), [])
+
+    def test_pages_match_live_query(self):
+        """Страницы из таблицы и за её пределами совпадают с лентой"""
+        newest = [post.pk for post in reversed(self.posts)]
+        with CaptureQueriesContext(connection) as queries:
+            first_page = self.page_ids(reverse('posts:index'))
+        self.assertEqual(first_page, newest[:3])
+        self.assertTrue(any(
+            'posts_feedentry' in query['sql'] for query in queries
+        ))
+        index = reverse('posts:index')
+        self.assertEqual(self.page_ids(index + '?page=2'), newest[3:6])
+        self.assertEqual(self.page_ids(index + '?page=3'), newest[6:])
+        group_page = self.page_ids(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(group_page, newest[::2][:3])
+
+    def test_check_feeds_command(self):
+        """Команда находит массовую вставку мимо сигналов и чинит ленты"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Массовый пост') for _ in range(2)
+        )
+        with self.assertRaises(CommandError):
+            call_command('check_feeds', stdout=StringIO(), stderr=StringIO())
+        call_command(
+            'check_feeds', '--fix', stdout=StringIO(), stderr=StringIO()
+        )
+        self.assertEqual(check_feeds(), [])
+
+    def test_unbuilt_feed_falls_back_to_live_query(self):
+        """Пока ленту не построили, страницы читаются живым запросом"""
+        FeedEntry.objects.all().delete()
+        newest = [post.pk for post in reversed(self.posts)]
+        self.assertEqual(self.page_ids(reverse('posts:index')), newest[:3])
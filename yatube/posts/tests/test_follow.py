@@ -0,0 +1,155 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..following import rebuild_inboxes, trim_inboxes
+from ..models import AuthorStat, Follow, InboxEntry, Post
+
+User = get_user_model()
+
+
+@override_settings(
+    COUNT_POSTS=3, POSTS_FOLLOW_FEED='write', POSTS_FOLLOW_INBOX_SIZE=100,
+    POSTS_FOLLOW_FANOUT_LIMIT=1000,
+)
+class FollowTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Reader')
+        cls.authors = [
+            User.objects.create_user(username=f'Author{number}')
+            for number in range(3)
+        ]
+        cls.stranger = User.objects.create_user(username='Stranger')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def follow(self, author):
+        return self.client.get(
+            reverse('posts:profile_follow', args=[author.username])
+        )
+
+    def create_posts(self, count=3):
+        return [
+            Post.objects.create(author=author, text=f'Пост {number}')
+            for number in range(count)
+            for author in self.authors + [self.stranger]
+        ]
+
+    def live_ids(self):
+        return list(
+            Post.objects.filter(author__following__user=self.user)
+            .values_list('pk', flat=True)
+        )
+
+    def feed_ids(self):
+        """Все страницы ленты подписок, пройденные по курсорам."""
+        ids = []
+        url = reverse('posts:follow_index')
+        while url:
+            page_obj = self.client.get(url).context['page_obj']
+            ids += [post.pk for post in page_obj]
+            url = page_obj.has_next() and (
+                reverse('posts:follow_index') + '?cursor='
+                + page_obj.next_cursor
+            )
+        return ids
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют подписки и счётчик подписчиков"""
+        author = self.authors[0]
+        response = self.follow(author)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=[author.username])
+        )
+        self.follow(author)
+        self.follow(self.user)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            AuthorStat.objects.get(user=author).followers_count, 1
+        )
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[author.username])
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(
+            AuthorStat.objects.get(user=author).followers_count, 0
+        )
+
+    def test_profile_button_follows_state(self):
+        """Кнопка профиля зависит от подписки и не отдаётся из 304"""
+        url = reverse('posts:profile', args=[self.authors[0].username])
+        response = self.client.get(url)
+        self.assertContains(response, 'Подписаться')
+        self.follow(self.authors[0])
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Отписаться')
+
+    def test_strategies_match_live_query(self):
+        """Обе стратегии и гибрид дают ленту живого запроса"""
+        for author in self.authors[:2]:
+            self.follow(author)
+        self.create_posts()
+        self.follow(self.authors[2])
+        self.create_posts(2)
+        for strategy, limit in (('read', 1000), ('write', 1000), ('write', 0)):
+            with self.subTest(strategy=strategy, limit=limit):
+                with override_settings(
+                    POSTS_FOLLOW_FEED=strategy,
+                    POSTS_FOLLOW_FANOUT_LIMIT=limit,
+                ):
+                    self.assertEqual(self.feed_ids(), self.live_ids())
+
+    def test_new_posts_are_pushed_to_inboxes(self):
+        """Новый пост попадает во входящие, после отписки — уходит"""
+        self.follow(self.authors[0])
+        post = Post.objects.create(author=self.authors[0], text='Новый')
+        Post.objects.create(author=self.stranger, text='Чужой')
+        self.assertEqual(
+            list(InboxEntry.objects.values_list('user', 'post')),
+            [(self.user.pk, post.pk)],
+        )
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[self.authors[0].username])
+        )
+        self.assertFalse(InboxEntry.objects.exists())
+
+    def test_heavy_authors_are_pulled(self):
+        """Посты автора сверх порога подписчиков не раскладываются"""
+        self.follow(self.authors[0])
+        with override_settings(POSTS_FOLLOW_FANOUT_LIMIT=0):
+            post = Post.objects.create(author=self.authors[0], text='Пост')
+            self.assertFalse(InboxEntry.objects.filter(post=post).exists())
+            self.assertEqual(self.feed_ids(), [post.pk])
+
+    def test_pages_past_trimmed_inbox(self):
+        """Страницы за обрезанными входящими читаются слиянием"""
+        for author in self.authors:
+            self.follow(author)
+        self.create_posts(4)
+        with override_settings(POSTS_FOLLOW_INBOX_SIZE=4):
+            self.assertEqual(trim_inboxes(), (1, 8))
+            self.follow(self.stranger)
+            self.assertLessEqual(InboxEntry.objects.count(), 4)
+            self.assertEqual(self.feed_ids(), self.live_ids())
+
+    def test_rebuild_inboxes_command(self):
+        """Команда собирает входящие после массовой вставки постов"""
+        self.follow(self.authors[0])
+        Post.objects.bulk_create(
+            Post(author=self.authors[0], text='Массовый пост')
+            for _ in range(2)
+        )
+        call_command('rebuild_inboxes', stdout=StringIO())
+        self.assertEqual(InboxEntry.objects.count(), 2)
+        self.assertEqual(rebuild_inboxes([self.user.pk]), (1, 2))
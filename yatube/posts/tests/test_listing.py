@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from ..listing import _reverse, post_rows
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostRowsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.leo = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой'
+        )
+        cls.anna = User.objects.create_user(username='anna')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for number in range(6):
+            Post.objects.create(
+                author=cls.leo if number % 2 else cls.anna,
+                group=cls.group if number % 3 else None,
+                text=f'Пост {number}',
+            )
+
+    def test_rows_resolve_once_per_author_and_group(self):
+        """Имя и ссылки считаются один раз на автора и группу"""
+        posts = list(Post.objects.for_feed())
+        _reverse.cache_clear()
+        with mock.patch.object(
+            User, 'get_full_name', autospec=True, return_value='Имя'
+        ) as get_full_name:
+            rows = post_rows(posts)
+        self.assertEqual(get_full_name.call_count, 2)
+        # Профили двух авторов, одна группа и шесть постов.
+        self.assertEqual(_reverse.cache_info().misses, 9)
+        post_rows(posts)
+        self.assertEqual(_reverse.cache_info().misses, 9)
+        for row, post in zip(rows, posts):
+            with self.subTest(post=post.pk):
+                self.assertEqual(row.url, reverse(
+                    'posts:post_detail', kwargs={'post_id': post.pk}
+                ))
+                self.assertEqual(row.profile_url, reverse(
+                    'posts:profile', args=[post.author.username]
+                ))
+                self.assertEqual(
+                    row.group_url,
+                    reverse('posts:group_list', args=[self.group.slug])
+                    if post.group_id else None,
+                )
+
+    def test_index_renders_rows(self):
+        """Главная показывает имя автора и ссылки из строк ленты"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Лев Толстой')
+        self.assertContains(
+            response, reverse('posts:profile', args=['leo'])
+        )
+        self.assertContains(
+            response, reverse('posts:group_list', args=['group'])
+        )
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import AuthorStat, Group, Post
 
 User = get_user_model()
 
@@ -26,3 +29,65 @@ class PostModelTest(TestCase):
         task = PostModelTest.group  # Обратите внимание на синтаксис
         expected_object_name = task.title
         self.assertEqual(expected_object_name, str(task))
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other_user = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, user_count, group_count, other_group_count):
+        self.assertEqual(
+            AuthorStat.objects.get(user=self.user).posts_count, user_count
+        )
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).posts_count, group_count
+        )
+        self.assertEqual(
+            Group.objects.get(pk=self.other_group.pk).posts_count,
+            other_group_count
+        )
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, переносе и удалении поста."""
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Тестовый пост'
+        )
+        self.assertCounters(1, 1, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(1, 0, 1)
+        post.author = self.other_user
+        post.group = None
+        post.save()
+        self.assertCounters(0, 0, 0)
+        self.assertEqual(
+            AuthorStat.objects.get(user=self.other_user).posts_count, 1
+        )
+        post.delete()
+        self.assertEqual(
+            AuthorStat.objects.get(user=self.other_user).posts_count, 0
+        )
+
+    def test_rebuild_counters_command(self):
+        """Команда пересчитывает счётчики после массовой вставки."""
+        Post.objects.bulk_create(
+            Post(author=self.user, group=self.group, text='Тестовый пост')
+            for _ in range(3)
+        )
+        self.assertCounters(0, 0, 0)
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertCounters(3, 3, 0)
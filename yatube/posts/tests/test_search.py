@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post
+from ..search import filter_posts, fts5_available, search_post_ids
+
+User = get_user_model()
+
+
+class SearchTestsMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeUser')
+        cls.python = Post.objects.create(
+            author=cls.user, text='Учим Python: списки и словари'
+        )
+        cls.django = Post.objects.create(
+            author=cls.user, text='Django и Python: формы и шаблоны'
+        )
+        cls.cats = Post.objects.create(author=cls.user, text='Пост про котов')
+
+    def test_finds_posts_by_words(self):
+        """Поиск находит посты со всеми словами запроса"""
+        self.assertCountEqual(
+            search_post_ids('python'), [self.python.pk, self.django.pk]
+        )
+        self.assertEqual(search_post_ids('python формы'), [self.django.pk])
+        self.assertEqual(search_post_ids('кот'), [self.cats.pk])
+        self.assertEqual(search_post_ids('"); drop table --'), [])
+        self.assertEqual(search_post_ids(''), [])
+
+    def test_index_follows_edit_and_delete(self):
+        """Правка и удаление поста сразу видны в поиске"""
+        post = Post.objects.get(pk=self.cats.pk)
+        post.text = 'Пост про собак'
+        post.save()
+        self.assertEqual(search_post_ids('кот'), [])
+        self.assertEqual(search_post_ids('собак'), [post.pk])
+        post.delete()
+        self.assertEqual(search_post_ids('собак'), [])
+
+    def test_fresh_posts_rank_higher(self):
+        """При равной релевантности выше стоит более свежий пост"""
+        old = Post.objects.create(author=self.user, text='Новости недели')
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=365)
+        )
+        new = Post.objects.create(author=self.user, text='Новости недели')
+        self.assertEqual(search_post_ids('новости'), [new.pk, old.pk])
+
+    def test_reindex_command(self):
+        """reindex_posts восстанавливает индекс по таблице постов"""
+        Post.objects.filter(pk=self.cats.pk).update(text='Пост про сов')
+        call_command('reindex_posts', batch_size=2, stdout=StringIO())
+        self.assertEqual(search_post_ids('сов'), [self.cats.pk])
+        self.assertEqual(search_post_ids('кот'), [])
+
+    @override_settings(POSTS_SEARCH_MAX_RESULTS=2)
+    def test_filter_posts_is_not_limited(self):
+        """filter_posts отдаёт все совпадения, сверх лимита поиска"""
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Python {number}')
+        self.assertEqual(len(search_post_ids('python')), 2)
+        self.assertEqual(filter_posts(Post.objects.all(), 'python').count(), 5)
+        self.assertEqual(
+            list(filter_posts(Post.objects.all(), 'python формы')),
+            [self.django],
+        )
+        self.assertFalse(filter_posts(Post.objects.all(), '--').exists())
+
+    def test_admin_search_finds_every_match(self):
+        """Поиск в админке не обрезается лимитом поиска"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Python {number}')
+        with self.settings(POSTS_SEARCH_MAX_RESULTS=2):
+            response = self.client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'python'}
+            )
+        self.assertEqual(response.context['cl'].result_count, 5)
+
+    def test_search_page(self):
+        """Страница поиска показывает найденное и сохраняет запрос в ссылках"""
+        for number in range(12):
+            Post.objects.create(author=self.user, text=f'Заметка {number}')
+        response = self.client.get(reverse('posts:search'), {'q': 'заметка'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertIsInstance(response.context['page_obj'][0], Post)
+        self.assertContains(response, '?q=%D0%B7%D0%B0%D0%BC%D0%B5%D1%82')
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'заметка', 'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+
+@override_settings(POSTS_SEARCH_BACKEND='auto')
+class FTS5SearchTests(SearchTestsMixin, TestCase):
+    def setUp(self):
+        if not fts5_available():
+            self.skipTest('SQLite собран без FTS5')
+
+
+@override_settings(POSTS_SEARCH_BACKEND='inverted')
+class InvertedIndexSearchTests(SearchTestsMixin, TestCase):
+    pass
@@ -0,0 +1,40 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import AuthorStat, Group, Post
+
+
+class SeedDataCommandTest(TestCase):
+    def seed(self, prefix):
+        call_command(
+            'seed_data', users=5, groups=2, posts=50, seed=7, prefix=prefix,
+            stdout=StringIO(),
+        )
+        return list(
+            Post.objects.filter(author__username__startswith=prefix)
+            .order_by('pk').values_list('text', flat=True)
+        )
+
+    def test_same_seed_gives_same_data(self):
+        """Одинаковый seed даёт одинаковые тексты постов"""
+        self.assertEqual(self.seed('first'), self.seed('second'))
+
+    def test_counters_match_posts(self):
+        """Счётчики после наполнения совпадают с числом постов"""
+        self.seed('seed')
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(
+            sum(AuthorStat.objects.values_list('posts_count', flat=True)),
+            50,
+        )
+        for group in Group.objects.all():
+            self.assertEqual(group.posts_count, group.posts.count())
+
+    def test_repeated_prefix_is_rejected(self):
+        """Повторное наполнение с тем же префиксом просит другой"""
+        self.seed('seed')
+        with self.assertRaisesMessage(CommandError, '--prefix'):
+            self.seed('seed')
+        self.assertEqual(Post.objects.count(), 50)
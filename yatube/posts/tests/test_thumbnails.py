@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+from ..thumbnails import missing_thumbnails
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 100, 50)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # В кэше и записи хранилища sorl, и страницы лент.
+        cache.clear()
+        self.user = User.objects.create_user(username='SomeUser')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post(author=self.user, text='Пост с картинкой')
+        self.post.image.save(
+            'picture.jpg', ContentFile(make_image()), save=False
+        )
+        self.post.save()
+
+    def test_create_post_with_image(self):
+        """Картинку можно приложить к посту через форму"""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Новый пост',
+            'image': SimpleUploadedFile(
+                'new.jpg', make_image(), content_type='image/jpeg'
+            ),
+        })
+        post = Post.objects.get(text='Новый пост')
+        self.assertTrue(post.image.name.startswith('posts/new'))
+
+    def test_listing_does_not_touch_files(self):
+        """Лента строит srcset, не обращаясь к файлам"""
+        with mock.patch.object(
+            FileSystemStorage, 'exists', side_effect=AssertionError
+        ), mock.patch.object(
+            FileSystemStorage, 'open', side_effect=AssertionError
+        ):
+            response = self.client.get(reverse('posts:index'))
+        lazy_url = reverse('posts:thumbnail', args=[self.post.pk, 320])
+        self.assertContains(response, f'{lazy_url} 320w')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_thumbnail_view_makes_thumbnail(self):
+        """Первый запрос миниатюры делает её, лента берёт готовую"""
+        for width in (320, 640, 960):
+            response = self.client.get(
+                reverse('posts:thumbnail', args=[self.post.pk, width])
+            )
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(missing_thumbnails([self.post.image.name]), [])
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'width="320" height="213"')
+        self.assertNotContains(response, '/thumbnail/')
+        response = self.client.get(
+            reverse('posts:thumbnail', args=[self.post.pk, 100])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_make_thumbnails_command(self):
+        """Команда делает недостающие миниатюры и пропускает готовые"""
+        out = StringIO()
+        call_command('make_thumbnails', '--workers', '1', stdout=out)
+        self.assertIn('миниатюр: 3', out.getvalue())
+        self.assertEqual(missing_thumbnails([self.post.image.name]), [])
+        out = StringIO()
+        call_command('make_thumbnails', '--workers', '1', stdout=out)
+        self.assertIn('Картинок: 0', out.getvalue())
+
+    def test_delete_post_removes_image(self):
+        """Удаление поста удаляет картинку и её миниатюры"""
+        call_command('make_thumbnails', '--workers', '1', stdout=StringIO())
+        storage = self.post.image.storage
+        name = self.post.image.name
+        self.post.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertEqual(missing_thumbnails([name]), [name])
@@ -0,0 +1,112 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import AuthorStat, Follow, Group, InboxEntry, Post
+from ..search import search_post_ids
+
+User = get_user_model()
+
+
+class TransferCommandsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.pub_date = timezone.now() - timedelta(days=30)
+        for number in range(5):
+            post = Post.objects.create(
+                author=cls.user,
+                group=cls.group if number % 2 else None,
+                text=f'Пост номер {number}',
+            )
+            Post.objects.filter(pk=post.pk).update(pub_date=cls.pub_date)
+
+    def round_trip(self, name):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, name)
+            call_command('export_posts', path, chunk_size=2, stderr=StringIO())
+            Post.objects.all().delete()
+            call_command('import_posts', path, batch_size=2, stdout=StringIO())
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют тексты, даты, авторов и группы"""
+        expected = list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author', 'group'
+        ))
+        for name in ('posts.jsonl', 'posts.csv'):
+            with self.subTest(name=name):
+                self.round_trip(name)
+                self.assertEqual(
+                    list(Post.objects.order_by('pk').values_list(
+                        'text', 'pub_date', 'author', 'group'
+                    )),
+                    expected,
+                )
+
+    def test_import_updates_derived_data(self):
+        """После загрузки верны счётчики и поисковый индекс"""
+        self.round_trip('posts.jsonl')
+        self.user.post_stat.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.user.post_stat.posts_count, 5)
+        self.assertEqual(self.group.posts_count, 2)
+        self.assertEqual(len(search_post_ids('номер')), 5)
+
+    def test_unknown_rows_are_skipped(self):
+        """Строки с неизвестным автором или группой пропускаются"""
+        rows = (
+            '{"text": "a", "pub_date": "2021-01-01T00:00:00+00:00", '
+            '"author": "nobody", "group": ""}\n'
+            '{"text": "b", "pub_date": "2021-01-01T00:00:00+00:00", '
+            '"author": "SomeUser", "group": "missing"}\n'
+            '{"text": "c", "pub_date": "2021-01-01T00:00:00+00:00", '
+            '"author": "SomeUser", "group": "test-slug"}\n'
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as stream:
+            stream.write(rows)
+            stream.flush()
+            out = StringIO()
+            call_command('import_posts', stream.name, batch_size=1, stdout=out)
+        self.assertIn('Загружено постов: 1', out.getvalue())
+        self.assertIn('Пропущено', out.getvalue())
+        self.assertTrue(Post.objects.filter(text='c').exists())
+
+    @override_settings(
+        POSTS_FOLLOW_FEED='write', POSTS_FOLLOW_FANOUT_LIMIT=1000
+    )
+    def test_import_touches_only_imported_authors(self):
+        """Загрузка пересчитывает только своих авторов и их подписчиков"""
+        other = User.objects.create_user(username='Other')
+        reader = User.objects.create_user(username='Reader')
+        bystander = User.objects.create_user(username='Bystander')
+        Follow.objects.create(user=reader, author=self.user)
+        Follow.objects.create(user=bystander, author=other)
+        Post.objects.create(author=other, text='Пост другого автора')
+        # Расхождения, которые полный пересчёт исправил бы.
+        AuthorStat.objects.filter(user=other).update(posts_count=42)
+        InboxEntry.objects.filter(user=bystander).delete()
+        rows = (
+            '{"text": "новый", "pub_date": "2021-01-01T00:00:00+00:00", '
+            '"author": "SomeUser", "group": "test-slug"}\n'
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as stream:
+            stream.write(rows)
+            stream.flush()
+            call_command('import_posts', stream.name, stdout=StringIO())
+        imported = Post.objects.get(text='новый')
+        self.assertEqual(AuthorStat.objects.get(user=self.user).posts_count, 6)
+        self.assertEqual(AuthorStat.objects.get(user=other).posts_count, 42)
+        self.assertEqual(search_post_ids('новый'), [imported.pk])
+        self.assertTrue(
+            InboxEntry.objects.filter(user=reader, post=imported).exists()
+        )
+        self.assertFalse(InboxEntry.objects.filter(user=bystander).exists())
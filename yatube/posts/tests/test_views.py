@@ -1,6 +1,15 @@
+from io import StringIO
+
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import Client, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..forms import PostForm
@@ -204,3 +213,138 @@ class PaginatorViewsTest(TestCase):
         response = self.client.get(reverse(
             'posts:profile', kwargs={'username': self.author.username}))
         self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_cursor_pagination(self):
+        """Переход по курсорам вперёд и назад без номеров страниц"""
+        response = self.client.get(reverse('posts:index'))
+        first_page = response.context['page_obj']
+        self.assertTrue(first_page.is_cursor)
+        self.assertFalse(first_page.has_previous())
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': first_page.next_cursor}
+        )
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            {post.pk for post in first_page} & {
+                post.pk for post in second_page},
+            set(),
+        )
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': second_page.previous_cursor}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [post.pk for post in first_page],
+        )
+
+    def test_cursor_pagination_bad_cursor(self):
+        """Испорченный курсор открывает первую страницу"""
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+
+# Бюджет SQL-запросов на страницу для анонимного пользователя
+# при заполненной ленте (больше одной страницы постов).
+# Первый запрос каждой страницы — проверка ETag / Last-Modified.
+#   index       — проверка + страница постов + ограниченный подсчёт;
+#   group_list  — проверка + группа со счётчиком постов + страница постов;
+#   profile     — проверка + автор со счётчиком постов + страница постов;
+#   post_detail — проверка + пост с автором, группой и счётчиком автора.
+VIEW_QUERY_BUDGETS = {
+    'posts:index': 3,
+    'posts:group_list': 3,
+    'posts:profile': 3,
+    'posts:post_detail': 2,
+}
+
+
+class PageWindowTest(SimpleTestCase):
+    def render_navigation(self, pages, number):
+        paginator = Paginator(range(pages * 10), 10)
+        return render_to_string(
+            'posts/includes/paginator.html',
+            {'page_obj': paginator.page(number)},
+        )
+
+    def test_navigation_size_does_not_grow_with_pages(self):
+        """Размер навигации не зависит от числа страниц"""
+        small = self.render_navigation(pages=20, number=10)
+        large = self.render_navigation(pages=10_000, number=5_000)
+        self.assertIn('&hellip;', large)
+        self.assertIn('?page=10000', large)
+        self.assertIn('?page=5002', large)
+        self.assertNotIn('?page=5003"', large)
+        # Разница — только в длине номеров страниц.
+        self.assertLess(len(large) - len(small), 100)
+
+    def test_short_navigation_without_gaps(self):
+        """Несколько страниц показываются все, без пропусков"""
+        html = self.render_navigation(pages=5, number=3)
+        self.assertNotIn('&hellip;', html)
+        for number in range(1, 6):
+            self.assertIn(f'>{number}</', html)
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов на страницу не зависит от числа постов на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-group-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='SomeUser')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый текст'
+        )
+
+    def setUp(self):
+        # Бюджеты описывают отрисовку без кэша страниц
+        cache.clear()
+
+    def get_pages(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'SomeUser'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_feed_queries_do_not_grow_with_posts(self):
+        """Лишние посты других авторов не добавляют запросов"""
+        budgets = {url: self.count_queries(url) for url in self.get_pages()}
+        for number in range(4):
+            author = User.objects.create_user(username=f'author{number}')
+            Post.objects.create(
+                author=author, group=self.group, text='Тестовый текст'
+            )
+            Post.objects.create(author=self.author, text='Тестовый текст')
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), budget)
+
+    def test_views_fit_query_budget(self):
+        """Страницы укладываются в бюджет SQL-запросов"""
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text='Тестовый текст')
+            for _ in range(settings.COUNT_POSTS + 3)
+        )
+        call_command('rebuild_post_counters', stdout=StringIO())
+        call_command('rebuild_feeds', stdout=StringIO())
+        for name, url in zip(VIEW_QUERY_BUDGETS, self.get_pages()):
+            with self.subTest(name=name):
+                with self.assertNumQueries(VIEW_QUERY_BUDGETS[name]):
+                    self.client.get(url)
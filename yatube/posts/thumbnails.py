@@ -0,0 +1,161 @@
+"""Миниатюры картинок постов.
+
+Миниатюры ширин POSTS_THUMBNAIL_WIDTHS делает sorl-thumbnail,
+а сведения о готовых хранит его key-value хранилище. Лента только
+читает хранилище — одним get_many на страницу — и не обращается
+ни к файловой системе, ни к базе: вместо ещё не сделанной миниатюры
+в разметку идёт адрес представления thumbnail, которое сделает её
+при первом запросе. Команда make_thumbnails делает миниатюры заранее
+в несколько процессов.
+"""
+from django.conf import settings
+from django.urls import reverse
+from sorl.thumbnail import default, delete, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.models import KVStore
+
+# Без увеличения: маленькая картинка остаётся своего размера.
+OPTIONS = {'upscale': False}
+
+
+class Thumbnails:
+    """Разметка картинки поста: src, srcset и размеры, если известны."""
+    __slots__ = ('src', 'srcset', 'width', 'height')
+
+    def __init__(self, src, srcset, width=None, height=None):
+        self.src = src
+        self.srcset = srcset
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return f'<Thumbnails {self.src}>'
+
+
+def thumbnail_file(file_, width):
+    """ImageFile миниатюры — то же имя, что даст get_thumbnail().
+
+    Повторяет подготовку параметров из ThumbnailBackend.get_thumbnail,
+    но не читает исходник и не проверяет файлы.
+    """
+    backend = ThumbnailBackend()
+    source = ImageFile(file_)
+    options = dict(OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, str(width), options)
+    return ImageFile(name, default.storage)
+
+
+def cached_thumbnails(files):
+    """Готовые миниатюры из хранилища: {ключ: ImageFile}.
+
+    У хранилища cached_db читается только кэш: промах значит «ещё
+    не готово», а запрос к базе сделает представление thumbnail.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, cached_db_kvstore.KVStore):
+        found = {file_.key: kvstore.get(file_) for file_ in files}
+        return {key: value for key, value in found.items() if value}
+    keys = {add_prefix(file_.key): file_.key for file_ in files}
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in kvstore.cache.get_many(list(keys)).items()
+        # Отсутствие записи sorl тоже кэширует — особым объектом.
+        if isinstance(value, str)
+    }
+
+
+def stored_keys(files):
+    """Ключи миниатюр, записанных в хранилище, — с учётом базы."""
+    kvstore = default.kvstore
+    if not isinstance(kvstore, cached_db_kvstore.KVStore):
+        return {file_.key for file_ in files if kvstore.get(file_)}
+    keys = {add_prefix(file_.key): file_.key for file_ in files}
+    return {
+        keys[key] for key in KVStore.objects.filter(
+            key__in=list(keys)
+        ).values_list('key', flat=True)
+    }
+
+
+def page_thumbnails(posts):
+    """Разметка картинок постов страницы: {pk поста: Thumbnails}."""
+    widths = settings.POSTS_THUMBNAIL_WIDTHS
+    files = {
+        (post.pk, width): thumbnail_file(post.image, width)
+        for post in posts if post.image
+        for width in widths
+    }
+    ready = cached_thumbnails(files.values())
+    result = {}
+    for post in posts:
+        if not post.image:
+            continue
+        urls = {}
+        for width in widths:
+            thumbnail = ready.get(files[post.pk, width].key)
+            if thumbnail is None:
+                url = reverse('posts:thumbnail', args=[post.pk, width])
+            else:
+                # Маленький оригинал даёт одинаковые миниатюры.
+                url, width = thumbnail.url, thumbnail.width
+            urls.setdefault(width, url)
+        smallest = ready.get(files[post.pk, widths[0]].key)
+        result[post.pk] = Thumbnails(
+            next(iter(urls.values())),
+            ', '.join(f'{url} {width}w' for width, url in urls.items()),
+            *((smallest.width, smallest.height) if smallest else ()),
+        )
+    return result
+
+
+def make_thumbnail(file_, width):
+    return get_thumbnail(file_, str(width), **OPTIONS)
+
+
+def make_thumbnails(name):
+    """Делает все миниатюры картинки и возвращает их число."""
+    return len([
+        make_thumbnail(name, width)
+        for width in settings.POSTS_THUMBNAIL_WIDTHS
+    ])
+
+
+def missing_thumbnails(names):
+    """Картинки, у которых готовы не все миниатюры."""
+    files = {
+        name: [
+            thumbnail_file(name, width)
+            for width in settings.POSTS_THUMBNAIL_WIDTHS
+        ]
+        for name in names
+    }
+    ready = stored_keys(
+        file_ for thumbnails in files.values() for file_ in thumbnails
+    )
+    return [
+        name for name, thumbnails in files.items()
+        if any(file_.key not in ready for file_ in thumbnails)
+    ]
+
+
+def delete_thumbnails(name):
+    """Удаляет миниатюры картинки и записи о них, саму картинку — нет."""
+    delete(name, delete_file=False)
+
+
+def delete_image(name):
+    """Удаляет картинку вместе с миниатюрами."""
+    delete(name, delete_file=True)
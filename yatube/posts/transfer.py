@@ -0,0 +1,185 @@
+"""Потоковый импорт и экспорт постов в JSON Lines и CSV.
+
+Строки читаются и пишутся порциями, поэтому память не растёт
+с размером таблицы. Авторы и группы указываются по username и slug
+и при импорте берутся из словарей, загруженных одним запросом.
+"""
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import forget_objects, group_feed, invalidate_feed, profile_feed
+from .counters import recount_posts
+from .feeds import INDEX_FEED, rebuild_feeds
+from .following import rebuild_inboxes
+from .models import Follow, Group, Post, User
+from .search import index_batches
+
+FIELDS = ('text', 'pub_date', 'author', 'group')
+FORMATS = ('jsonl', 'csv')
+
+
+def guess_format(path):
+    return 'csv' if path.endswith('.csv') else 'jsonl'
+
+
+def export_rows(chunk_size=2000):
+    """Строки постов в порядке id; модели не создаются."""
+    rows = Post.objects.order_by('pk').values_list(
+        'text', 'pub_date', 'author__username', 'group__slug'
+    ).iterator(chunk_size=chunk_size)
+    for text, pub_date, author, group in rows:
+        yield {
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group or '',
+        }
+
+
+def write_rows(rows, stream, fmt):
+    """Пишет строки в поток и возвращает их число."""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def read_rows(stream, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+@contextmanager
+def keep_dates():
+    """Отключает auto_now_add и auto_now у дат поста.
+
+    Без этого bulk_create проставит всем импортированным постам
+    текущее время вместо даты из файла.
+    """
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Post._meta.get_field('updated_at'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.author_ids = set()
+        self.group_ids = set()
+
+
+def make_post(row, authors, groups):
+    """Пост из строки файла или None, если строку не разобрать."""
+    author_id = authors.get(row.get('author'))
+    group_slug = row.get('group') or None
+    group_id = groups.get(group_slug)
+    pub_date = parse_datetime(row.get('pub_date') or '')
+    if author_id is None or pub_date is None:
+        return None
+    if group_slug is not None and group_id is None:
+        return None
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return Post(
+        text=row.get('text', ''),
+        pub_date=pub_date,
+        updated_at=pub_date,
+        author_id=author_id,
+        group_id=group_id,
+    )
+
+
+def import_rows(rows, batch_size=1000):
+    """Создаёт посты пакетами по batch_size.
+
+    Строки с неизвестным автором или группой пропускаются.
+    bulk_create не вызывает сигналы, поэтому счётчики, поисковый
+    индекс и кэш лент обновляются один раз после вставки.
+    """
+    authors = dict(User.objects.values_list('username', 'pk'))
+    groups = dict(Group.objects.values_list('slug', 'pk'))
+    result = ImportResult()
+    rows = iter(rows)
+    with transaction.atomic(), keep_dates():
+        # bulk_create на SQLite не возвращает id: новые посты — те,
+        # что после последнего существующего.
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            batch = []
+            for row in chunk:
+                post = make_post(row, authors, groups)
+                if post is None:
+                    result.skipped += 1
+                    continue
+                batch.append(post)
+                result.author_ids.add(post.author_id)
+                if post.group_id is not None:
+                    result.group_ids.add(post.group_id)
+            Post.objects.bulk_create(batch)
+            result.created += len(batch)
+        if result.created:
+            refresh_derived(
+                result.author_ids, result.group_ids,
+                Post.objects.filter(pk__gt=last_pk),
+            )
+    return result
+
+
+def refresh_derived(author_ids, group_ids, posts):
+    """Обновляет то, что для одиночных постов ведут сигналы.
+
+    posts — вставленные посты. Пересчитываются только затронутые
+    авторы, группы, ленты и входящие их подписчиков, поэтому цена
+    зависит от пачки, а не от размера базы.
+    """
+    recount_posts(author_ids, group_ids)
+    index_batches(posts)
+    rebuild_feeds(
+        [INDEX_FEED] + [group_feed(group_id) for group_id in group_ids]
+    )
+    rebuild_inboxes(
+        Follow.objects.filter(author_id__in=author_ids)
+        .order_by('user_id').values_list('user_id', flat=True).distinct()
+    )
+    invalidate_imported(author_ids, group_ids)
+
+
+def invalidate_imported(author_ids, group_ids):
+    invalidate_feed('index')
+    for author_id in author_ids:
+        invalidate_feed(profile_feed(author_id))
+    for group_id in group_ids:
+        invalidate_feed(group_feed(group_id))
+    forget_objects(group_ids=group_ids, author_ids=author_ids)
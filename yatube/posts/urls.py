@@ -8,8 +8,31 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('follow/', views.follow_index, name='follow_index'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow',
+    ),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow',
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comment/',
+        views.add_comment,
+        name='add_comment',
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/thumbnail/<int:width>/',
+        views.thumbnail,
+        name='thumbnail',
+    ),
+    path('search/', views.search, name='search'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
 ]
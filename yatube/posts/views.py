@@ -1,69 +1,141 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
+from django.utils.http import urlencode
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .forms import PostForm
-from .models import Group, Post, User
+from .cache import (
+    FeedPageCache, get_cached_object, group_feed, profile_feed, stats
+)
+from .conditional import (
+    conditional_page, group_state, index_state, post_state, profile_state
+)
+from .feeds import INDEX_FEED, MaterializedFeed
+from .comments import reply_parent, thread_page
+from .following import get_follow_feed
+from .forms import CommentForm, PostForm
+from .listing import PageRows
+from .models import Follow, Group, Post, User, get_posts_count
 from .pagination import get_paginator_page
+from .search import search_post_ids
+from .thumbnails import make_thumbnail, page_thumbnails
 
 
+@conditional_page(index_state)
 def index(request):
     title = "Главная страница проекта Yatube"
-    posts = Post.objects.select_related('group')[:settings.COUNT_POSTS]
-    post_list = Post.objects.all()
-    page_obj = get_paginator_page(request, post_list)
+    page_obj = get_paginator_page(
+        request, Post.objects.for_feed(),
+        feed=MaterializedFeed.get(INDEX_FEED),
+    )
     context = {
-        'posts': posts,
         'title': title,
         'page_obj': page_obj,
+        'rows': PageRows(page_obj),
+        'feed_cache': FeedPageCache.for_request(request, 'index'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(group_state)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_paginator_page(request, posts)
+    group = get_cached_object('group', slug, Group, slug=slug)
+    page_obj = get_paginator_page(
+        request, group.posts.for_feed(), count=group.posts_count,
+        feed=MaterializedFeed.get(group_feed(group.pk)),
+    )
     context = {
         'group': group,
-        'posts': posts,
         'page_obj': page_obj,
+        'rows': PageRows(page_obj),
+        'feed_cache': FeedPageCache.for_request(
+            request, 'group', group_feed(group.pk)
+        ),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(profile_state)
 def profile(request, username):
     title = "Профайл пользователя " + username
-    user = get_object_or_404(User, username=username)
-    posts = Post.objects.select_related('author').filter(author=user)
-    posts_count = posts.count()
-    paginator = Paginator(posts, settings.COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    user = get_cached_object(
+        'profile',
+        username,
+        # В общий кэш — только то, что нужно странице, без пароля.
+        User.objects.select_related('post_stat').only(
+            'username', 'first_name', 'last_name', 'post_stat__posts_count'
+        ),
+        username=username,
+    )
+    posts_count = get_posts_count(user)
+    page_obj = get_paginator_page(
+        request, user.posts.for_feed(), count=posts_count
+    )
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=user
+    ).exists()
     context = {
         'author': user,
+        'following': following,
         'posts_count': posts_count,
         'page_obj': page_obj,
+        'rows': PageRows(page_obj),
         'title': title,
-        'posts': posts,
+        'feed_cache': FeedPageCache.for_request(
+            request, 'profile', profile_feed(user.pk)
+        ),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_page(post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_list = Post.objects.all()
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id)
     context = {
         'post': post,
-        'post_list': post_list,
+        'image': page_thumbnails([post]).get(post.pk),
+        'comments': thread_page(post, request.GET.get('cursor')),
+        'form': CommentForm(initial={'parent': request.GET.get('reply')}),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@login_required
+def add_comment(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    form = CommentForm(request.POST or None, post=post)
+    if form.is_valid():
+        comment = form.save(commit=False)
+        comment.post = post
+        comment.author = request.user
+        comment.parent = reply_parent(comment.parent)
+        comment.save()
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(search_post_ids(query), settings.COUNT_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    # Пагинируем список id, а посты загружаем только для одной страницы.
+    posts = Post.objects.for_feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'rows': PageRows(page_obj),
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -75,7 +147,9 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -87,3 +161,48 @@ def post_edit(request, post_id):
         'post': post,
     }
     return render(request, 'posts/create_post.html', context)
+
+
+@login_required
+def follow_index(request):
+    page_obj = get_paginator_page(
+        request,
+        Post.objects.for_feed().filter(author__following__user=request.user),
+        feed=get_follow_feed(request.user.pk),
+    )
+    context = {
+        'page_obj': page_obj,
+        'rows': PageRows(page_obj),
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    # delete() у QuerySet тоже шлёт post_delete на каждую подписку.
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return redirect('posts:profile', username=username)
+
+
+def thumbnail(request, post_id, width):
+    """Делает миниатюру при первом запросе и отправляет к файлу."""
+    if width not in settings.POSTS_THUMBNAIL_WIDTHS:
+        raise Http404
+    post = get_object_or_404(Post.objects.only('image'), pk=post_id)
+    if not post.image:
+        raise Http404
+    return redirect(make_thumbnail(post.image, width).url)
+
+
+@staff_member_required
+def cache_stats(request):
+    return JsonResponse(stats())
@@ -23,9 +23,14 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = '_20zhp)jg12io3uau(#z*5lc)r5-y9vu_(8w(6xb_$33cv$401'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 
-ALLOWED_HOSTS = []
+# Через запятую. Без DEBUG Django отвечает 400 на всё, что не в списке.
+ALLOWED_HOSTS = [
+    host.strip() for host in os.getenv(
+        'DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1,[::1]'
+    ).split(',') if host.strip()
+]
 
 
 # Application definition
@@ -41,9 +46,15 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PrecompressedStaticMiddleware',
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.QueryLogMiddleware',
+    'core.middleware.PrimaryStickyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,12 +67,22 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Вне отладки шаблоны разбираются один раз и берутся из памяти;
+# при DEBUG правки шаблонов видны без перезапуска сервера.
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -83,8 +104,146 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами воркера столько секунд.
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '60')),
     }
 }
+# PRAGMA для каждого нового соединения SQLite (см. core/db.py).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кэша в КиБ.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+# Реплики для чтения: файлы баз через запятую в DATABASE_REPLICAS.
+# Чтения моделей из REPLICA_APPS идут на случайную реплику, записи —
+# в default; после записи пользователь REPLICA_STICKY_SECONDS секунд
+# читает только с default, чтобы сразу видеть свои изменения.
+for number, name in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_ALIASES = [alias for alias in DATABASES if alias != 'default']
+REPLICA_APPS = ['posts']
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_COOKIE = 'db_primary'
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Алиас из CACHES для отрисованных страниц лент
+POSTS_CACHE_ALIAS = 'default'
+POSTS_CACHE_TIMEOUT = 60 * 5
+# Отдавать устаревшую страницу, пока её перерисовывает один запрос
+POSTS_CACHE_STALE_WHILE_REVALIDATE = True
+# Сколько ещё можно отдавать устаревшую страницу после POSTS_CACHE_TIMEOUT
+POSTS_CACHE_STALE_TIMEOUT = 60 * 60
+# Сколько длится блокировка перерисовки, если отрисовка упала
+POSTS_CACHE_LOCK_TIMEOUT = 30
+
+# Сжатие ответов (CompressionMiddleware)
+COMPRESSION_ENABLED = True
+# Ответы короче этого (в байтах) не сжимаются: выигрыш меньше заголовков
+COMPRESSION_MIN_SIZE = 1024
+# Уровни на запрос: brotli 5 и gzip 6 сжимают почти как максимальные
+# при в разы меньших затратах процессора (manage.py bench_compression)
+COMPRESSION_LEVELS = {'br': 5, 'gzip': 6}
+# Хранить сжатые страницы с ETag, повтор отдаётся без отрисовки
+COMPRESSION_CACHE_PAGES = True
+COMPRESSION_CACHE_ALIAS = 'default'
+COMPRESSION_CACHE_TIMEOUT = 60 * 5
+
+# Комментарии: сколько показывать на странице поста (дальше — по
+# курсору), глубина вложенности ответов и сколько последних
+# комментариев показывать под постом в лентах
+COMMENTS_PER_PAGE = 50
+COMMENTS_MAX_DEPTH = 8
+COMMENTS_PREVIEW = 2
+
+# Лента подписок: 'read' — слияние постов авторов при запросе,
+# 'write' — раскладка новых постов во входящие подписчиков
+POSTS_FOLLOW_FEED = 'write'
+# Сколько первых постов ленты подписок хранят входящие
+POSTS_FOLLOW_INBOX_SIZE = 500
+# Посты авторов с большим числом подписчиков не раскладываются,
+# а дочитываются при запросе
+POSTS_FOLLOW_FANOUT_LIMIT = 1000
+
+# Поиск по постам: 'fts5' (SQLite), 'inverted' (таблица SearchTerm)
+# или 'auto' — FTS5, если он доступен.
+POSTS_SEARCH_BACKEND = 'auto'
+# Сколько найденных постов ранжировать и показывать.
+POSTS_SEARCH_MAX_RESULTS = 1000
+# Свежесть поста: через сколько дней её вклад в ранг падает вдвое
+# и какой у неё вес относительно релевантности.
+POSTS_SEARCH_RECENCY_HALF_LIFE_DAYS = 30
+POSTS_SEARCH_RECENCY_WEIGHT = 0.3
+# Сколько первых страниц главной и лент групп хранить в таблице
+# FeedEntry (0 — читать ленты только живым запросом)
+POSTS_FEED_PAGES = 5
+
+# Замеры запросов: доля замеряемых запросов (0..1), заголовок
+# Server-Timing, сколько последних замеров хранить на имя URL
+# и границы корзин гистограммы времени ответа в миллисекундах.
+PERF_METRICS_ENABLED = True
+PERF_METRICS_SAMPLE_RATE = float(
+    os.getenv('PERF_METRICS_SAMPLE_RATE', '0.1')
+)
+PERF_METRICS_SERVER_TIMING = True
+PERF_METRICS_WINDOW = 1000
+PERF_METRICS_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Журнал SQL: запросы дольше QUERY_LOG_SLOW_MS и одинаковые запросы,
+# повторённые за один HTTP-запрос больше QUERY_LOG_DUPLICATE_LIMIT раз.
+# Если задан QUERY_LOG_FILE, записи пишутся туда для query_report.
+QUERY_LOG_ENABLED = True
+QUERY_LOG_SLOW_MS = 100
+QUERY_LOG_DUPLICATE_LIMIT = 5
+QUERY_LOG_FILE = os.getenv('QUERY_LOG_FILE')
+
+# Строки замеров пишутся в JSON через логгер core.performance;
+# чтобы они попадали в журнал, задайте PERF_METRICS_LOG_LEVEL=INFO.
+LOGGING_HANDLERS = {
+    'console': {'class': 'logging.StreamHandler'},
+}
+if QUERY_LOG_FILE:
+    LOGGING_HANDLERS['query_file'] = {
+        'class': 'logging.handlers.WatchedFileHandler',
+        'filename': QUERY_LOG_FILE,
+    }
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': LOGGING_HANDLERS,
+    'loggers': {
+        'core.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERF_METRICS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'core.queries': {
+            'handlers': list(LOGGING_HANDLERS),
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
 
 
 # Password validation
@@ -127,7 +286,40 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+# В бою статика собирается collectstatic: имена с хешем содержимого
+# и рядом копии .gz и .br. Шаблонам нужен манифест, поэтому после
+# правки статики collectstatic запускают до перезапуска сервера.
+if not DEBUG:
+    STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStorage'
+# Отдавать собранную статику из STATIC_ROOT через
+# PrecompressedStaticMiddleware; при DEBUG её отдаёт runserver
+STATIC_SERVE = not DEBUG
+# Файлы с хешем в имени не меняются — кэшируются на год
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+# Прочие (favicon.ico по старому адресу и т. п.) — ненадолго
+STATIC_UNHASHED_MAX_AGE = 60 * 60
+
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Миниатюры картинок постов: ширины для srcset, от меньшей к большей
+POSTS_THUMBNAIL_WIDTHS = [320, 640, 960]
+THUMBNAIL_QUALITY = 85
+# Ленты узнают о готовых миниатюрах только из этого кэша; в бою он
+# должен быть общим для процессов (memcached, redis), а не locmem.
+THUMBNAIL_CACHE = 'default'
+
 COUNT_POSTS = int(10)
+# Навигация по ленте курсорами (pub_date, id) вместо OFFSET;
+# ссылки вида ?page=N по-прежнему работают
+PAGINATION_CURSOR = True
+# Сколько записей считать не дальше этого предела; None — точный COUNT(*)
+PAGINATION_COUNT_LIMIT = 1000
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGINATION_WINDOW = 2
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
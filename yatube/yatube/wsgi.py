@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Шаблоны компилируются до первого запроса (только с кэширующим
+# загрузчиком, то есть без DEBUG).
+from core.templates import warm_templates  # noqa: E402
+
+warm_templates()